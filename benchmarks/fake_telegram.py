@@ -0,0 +1,113 @@
+"""Имитация Telegram для бенчмарков: клиент вместо pyrogram.Client без сети.
+
+Отдает N синтетических участников через тот же raw-запрос
+channels.GetParticipants, что и настоящий сервер, поэтому парсер проходит
+весь путь: fetch_members_page -> ChatMember._parse -> записи -> пачки.
+Можно задать задержку страницы и периодические FloodWait и обрывы связи.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from pyrogram import raw
+from pyrogram.errors import FloodWait
+
+
+SYNTHETIC_CHAT_ID = -1001000000001
+# Начало отсчета времени последнего посещения синтетических участников
+SYNTHETIC_EPOCH = 1700000000
+
+
+def synthetic_user(user_id):
+    """Синтетический участник с разнообразными флагами и статусами"""
+    kind = user_id % 6
+    if kind == 0:
+        status = raw.types.UserStatusOffline(was_online=SYNTHETIC_EPOCH + user_id)
+    elif kind == 1:
+        status = raw.types.UserStatusRecently()
+    elif kind == 2:
+        status = raw.types.UserStatusOnline(expires=SYNTHETIC_EPOCH)
+    elif kind == 3:
+        status = raw.types.UserStatusLastWeek()
+    elif kind == 4:
+        status = raw.types.UserStatusLastMonth()
+    else:
+        status = raw.types.UserStatusEmpty()  # pyrogram: UserStatus.LONG_AGO
+
+    return raw.types.User(
+        id=user_id,
+        access_hash=user_id * 7919,
+        first_name=f"Участник {user_id}",
+        last_name="Тестовый" if user_id % 3 == 0 else None,
+        username=f"user{user_id}" if user_id % 4 else None,
+        bot=user_id % 50 == 0,
+        verified=user_id % 97 == 0,
+        scam=user_id % 1009 == 0,
+        premium=user_id % 5 == 0,
+        status=status,
+        restriction_reason=[]
+    )
+
+
+class FakeTelegramClient:
+    """Клиент с интерфейсом pyrogram.Client, нужным парсеру.
+
+    members - число участников группы, page_latency - задержка ответа
+    на страницу (секунды), flood_every / disconnect_every - каждый N-й
+    запрос страницы завершается FloodWait на flood_wait секунд или
+    обрывом соединения (0 - никогда).
+    """
+
+    def __init__(self, name="benchmark", *, members=1000, page_latency=0.0, flood_every=0, flood_wait=0,
+                 disconnect_every=0, **kwargs):
+        self.name = name
+        self.members = members
+        self.page_latency = page_latency
+        self.flood_every = flood_every
+        self.flood_wait = flood_wait
+        self.disconnect_every = disconnect_every
+        self.is_connected = False
+        self.requests = 0
+        self.flood_waits = 0
+        self.disconnects = 0
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+
+    async def get_me(self):
+        return SimpleNamespace(id=1, first_name="Benchmark")
+
+    async def get_chat(self, chat_id):
+        return SimpleNamespace(id=SYNTHETIC_CHAT_ID, title=f"Синтетическая группа {chat_id}",
+                               members_count=self.members)
+
+    async def resolve_peer(self, peer_id):
+        return raw.types.InputPeerChannel(channel_id=-SYNTHETIC_CHAT_ID - 1000000000000, access_hash=0)
+
+    async def invoke(self, query, sleep_threshold=None):
+        if not self.is_connected:
+            raise ConnectionError("Клиент не подключен")
+        if not isinstance(query, raw.functions.channels.GetParticipants):
+            raise NotImplementedError(type(query).__name__)
+
+        self.requests += 1
+        if self.page_latency:
+            await asyncio.sleep(self.page_latency)
+        if self.flood_every and self.requests % self.flood_every == 0:
+            self.flood_waits += 1
+            raise FloodWait(value=self.flood_wait)
+        if self.disconnect_every and self.requests % self.disconnect_every == 0:
+            self.disconnects += 1
+            self.is_connected = False
+            raise ConnectionError("Синтетический обрыв соединения")
+
+        user_ids = range(query.offset + 1, min(self.members, query.offset + query.limit) + 1)
+        return raw.types.channels.ChannelParticipants(
+            count=self.members,
+            participants=[raw.types.ChannelParticipant(user_id=user_id, date=SYNTHETIC_EPOCH)
+                          for user_id in user_ids],
+            chats=[],
+            users=[synthetic_user(user_id) for user_id in user_ids]
+        )
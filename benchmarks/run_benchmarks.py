@@ -0,0 +1,309 @@
+"""Бенчмарки парсера на синтетическом Telegram (без аккаунта и сети).
+
+Для каждого сценария (1k / 10k / 100k / 1m участников) в отдельном
+процессе измеряются: скорость парсинга (участников/с), время до первой
+строки, время заполнения таблицы результатов (fill_results_table),
+время экспорта в каждый формат, запись и повторное открытие снимка
+результатов и пиковое потребление памяти.
+Результаты сохраняются в JSON и могут сравниваться с прошлым запуском.
+
+Примеры:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenarios 1k,10k --flood-every 20 --page-latency 0.01
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/old.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+from fake_telegram import FakeTelegramClient  # noqa: E402
+from exporters import EXPORTERS, ExportWorker  # noqa: E402
+from member_columns import MemberColumns  # noqa: E402
+from parser_core import TelegramClientCache, TelegramParser  # noqa: E402
+from search_index import TrigramIndex  # noqa: E402
+from snapshot import SNAPSHOT_EXTENSION, load_snapshot, save_snapshot  # noqa: E402
+
+
+# Сценарий -> число участников в группе
+SCENARIOS = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+# Сколько строк читается из открытого снимка (первый экран таблицы)
+SNAPSHOT_PAGE_ROWS = 100
+# Запрос первого поиска в открытом снимке
+SNAPSHOT_QUERY = "user12"
+# Метрики, у которых больше - лучше (у остальных лучше меньше)
+HIGHER_IS_BETTER = {"members_per_sec"}
+
+
+def peak_rss_mb():
+    """Пиковое потребление памяти процессом (МБ) или None, если неизвестно"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS значение в байтах, на Linux - в килобайтах
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure_parse(members, options):
+    """Парсинг синтетической группы, возвращает метрики и полученные пачки"""
+    client_factory = partial(
+        FakeTelegramClient,
+        members=members,
+        page_latency=options.page_latency,
+        flood_every=options.flood_every,
+        flood_wait=options.flood_wait,
+        disconnect_every=options.disconnect_every
+    )
+    parser = TelegramParser(
+        "1", "benchmark", ["@synthetic"], max_members=0, session_name="benchmark",
+        requests_per_minute=options.rpm, client_cache=TelegramClientCache(client_factory)
+    )
+
+    batches = []
+    first_row = []
+    errors = []
+
+    def on_batch(job, batch):
+        if not first_row:
+            first_row.append(time.perf_counter())
+        batches.append(batch)
+
+    parser.batch_signal.connect(on_batch)
+    parser.job_failed.connect(lambda job, message: errors.append(message))
+    parser.error_signal.connect(errors.append)
+
+    started = time.perf_counter()
+    asyncio.run(parser.run())
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+    client = next(iter(parser.client_cache.clients.values()))
+    total = sum(len(batch) for batch in batches)
+    metrics = {
+        "members": total,
+        "parse_time": round(elapsed, 4),
+        "members_per_sec": round(total / elapsed, 1) if elapsed else None,
+        "time_to_first_row": round(first_row[0] - started, 4) if first_row else None,
+        "requests": client.requests,
+        "flood_waits": client.flood_waits,
+        "disconnects": client.disconnects,
+    }
+    return metrics, batches
+
+
+def measure_table_fill(batches):
+    """Время заполнения таблицы результатов GUI теми же пачками (None без PyQt6)"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from main import TelegramParserGUI
+    except ImportError:
+        return None
+
+    app = QApplication.instance() or QApplication([])
+    gui = TelegramParserGUI()
+    try:
+        gui.setup_results_tab()
+        gui.run_models = gui.job_models = [gui.results_model]
+
+        started = time.perf_counter()
+        for batch in batches:
+            gui.fill_results_table(0, batch)
+        app.processEvents()
+        return round(time.perf_counter() - started, 4)
+    finally:
+        gui.worker.stop()
+
+
+def measure_exports(batches):
+    """Время экспорта всех пачек в каждый формат"""
+    metrics = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name, exporter_class in EXPORTERS.items():
+            path = os.path.join(folder, "members" + exporter_class.extension)
+            started = time.perf_counter()
+            export = ExportWorker(exporter_class(path))
+            export.start()
+            for batch in batches:
+                export.submit(batch)
+            export.finish()
+            export.join()
+            if export.error:
+                raise RuntimeError(f"{name}: {export.error}")
+            key = name.lower().replace(" ", "_")
+            metrics[f"export_{key}_time"] = round(time.perf_counter() - started, 4)
+    return metrics
+
+
+def measure_snapshot(batches):
+    """Время записи снимка, его открытия с чтением первого экрана строк и первого поиска"""
+    columns = MemberColumns()
+    search_index = TrigramIndex()
+    for batch in batches:
+        columns.append(batch)
+        search_index.add(batch)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "members" + SNAPSHOT_EXTENSION)
+        started = time.perf_counter()
+        save_snapshot(path, columns, search_index)
+        save_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        snapshot = load_snapshot(path)
+        snapshot.columns.records(range(min(SNAPSHOT_PAGE_ROWS, len(snapshot.columns))))
+        open_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        snapshot.search_index.search(SNAPSHOT_QUERY)
+        search_time = time.perf_counter() - started
+        del snapshot  # Файл отображен в память - закрываем до удаления папки
+    return {"snapshot_save_time": round(save_time, 4), "snapshot_open_time": round(open_time, 4),
+            "snapshot_first_search_time": round(search_time, 4)}
+
+
+def run_scenario(name, options):
+    """Выполнение одного сценария в текущем процессе"""
+    metrics, batches = measure_parse(SCENARIOS[name], options)
+    if not options.skip_table:
+        metrics["fill_results_table_time"] = measure_table_fill(batches)
+    metrics.update(measure_exports(batches))
+    metrics.update(measure_snapshot(batches))
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return metrics
+
+
+def scenario_args(options):
+    """Параметры имитации для дочернего процесса"""
+    args = [
+        "--page-latency", str(options.page_latency),
+        "--flood-every", str(options.flood_every),
+        "--flood-wait", str(options.flood_wait),
+        "--disconnect-every", str(options.disconnect_every),
+        "--rpm", str(options.rpm),
+    ]
+    if options.skip_table:
+        args.append("--skip-table")
+    return args
+
+
+def run_in_subprocess(name, options):
+    """Сценарий в отдельном процессе, чтобы пиковая память не смешивалась"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", name, *scenario_args(options)],
+        capture_output=True, text=True, encoding="utf-8"
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Сценарий {name} завершился с ошибкой:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, max_regression):
+    """Сравнение с прошлым запуском, возвращает список ухудшений сверх порога"""
+    regressions = []
+    for name, metrics in results["scenarios"].items():
+        old_metrics = baseline.get("scenarios", {}).get(name)
+        if not old_metrics:
+            continue
+        print(f"\n{name}: сравнение с {baseline.get('created', 'базовым запуском')}")
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            mark = ""
+            if max_regression is not None and metric.endswith(("_time", "_per_sec")) and worse > max_regression:
+                mark = "  <- ухудшение"
+                regressions.append(f"{name}.{metric}: {old} -> {value}")
+            print(f"  {metric:28} {old:>14} -> {value:>14} ({change:+.1%}){mark}")
+    return regressions
+
+
+def print_results(results):
+    for name, metrics in results["scenarios"].items():
+        print(f"\n{name}:")
+        for metric, value in metrics.items():
+            print(f"  {metric:28} {value}")
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарки парсера на синтетическом Telegram")
+    arg_parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            help=f"Сценарии через запятую ({', '.join(SCENARIOS)})")
+    arg_parser.add_argument("--page-latency", type=float, default=0.0, help="Задержка ответа на страницу (сек)")
+    arg_parser.add_argument("--flood-every", type=int, default=0, help="FloodWait на каждый N-й запрос (0 - нет)")
+    arg_parser.add_argument("--flood-wait", type=int, default=0, help="Длительность FloodWait (сек)")
+    arg_parser.add_argument("--disconnect-every", type=int, default=0,
+                            help="Обрыв соединения на каждый N-й запрос (0 - нет)")
+    arg_parser.add_argument("--rpm", type=float, default=10 ** 9, help="Бюджет запросов в минуту")
+    arg_parser.add_argument("--skip-table", action="store_true", help="Не измерять заполнение таблицы GUI")
+    arg_parser.add_argument("--output", help="Файл результатов (по умолчанию benchmarks/results/<время>.json)")
+    arg_parser.add_argument("--baseline", help="Результаты прошлого запуска для сравнения")
+    arg_parser.add_argument("--max-regression", type=float,
+                            help="Допустимое ухудшение времени/скорости (доля, например 0.2)")
+    arg_parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return arg_parser
+
+
+def main(argv=None):
+    options = build_arg_parser().parse_args(argv)
+
+    if options.worker:
+        print(json.dumps(run_scenario(options.worker, options)))
+        return 0
+
+    names = [name.strip().lower() for name in options.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Неизвестные сценарии: {', '.join(unknown)}")
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": vars(options) | {"worker": None},
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"▶️ {name}...", flush=True)
+        results["scenarios"][name] = run_in_subprocess(name, options)
+    print_results(results)
+
+    output = options.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Результаты сохранены: {output}")
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), options.max_regression)
+        if regressions:
+            print("\n❌ Ухудшения сверх порога:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
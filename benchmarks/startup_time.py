@@ -0,0 +1,95 @@
+"""Проверка времени запуска GUI: от старта процесса до показанного окна.
+
+Каждый замер - отдельный процесс Python (холодный импорт модулей). Кроме
+времени проверяется, что при старте не загружены тяжелые модули, которые
+должны импортироваться только при первом использовании (pyrogram, NumPy).
+Без дисплея используется платформа Qt offscreen.
+
+Примеры:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --runs 5 --max-seconds 1.5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARKS_DIR, "..", "src")
+
+# Модули, которых не должно быть в процессе сразу после показа окна
+DEFERRED_MODULES = ("pyrogram", "numpy", "results_model")
+
+# Выполняется в дочернем процессе: запуск как в main.main(), но без цикла событий
+CHILD_CODE = f"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {SRC_DIR!r})
+from PyQt6.QtWidgets import QApplication
+import main
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+app.setStyleSheet(main.APP_STYLE_SHEET)
+window = main.TelegramParserGUI()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "window": shown - imported,
+    "loaded": [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}))
+window.worker.stop()
+"""
+
+
+def measure_startup():
+    """Один запуск в отдельном процессе: времена этапов и загруженные тяжелые модули"""
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD_CODE], env=env, capture_output=True, text=True,
+                            check=True).stdout
+    total = time.perf_counter() - started
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total"] = total
+    return result
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Время запуска GUI до показа окна")
+    arg_parser.add_argument("--runs", type=int, default=3, help="Число замеров (берется медиана)")
+    arg_parser.add_argument("--max-seconds", type=float, default=2.0,
+                            help="Допустимая медиана времени от старта процесса до окна")
+    arg_parser.add_argument("--output", help="Файл для результатов (JSON)")
+    args = arg_parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(max(1, args.runs))]
+    summary = {
+        stage: round(statistics.median(run[stage] for run in runs), 3)
+        for stage in ("import", "window", "total")
+    }
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    print(f"Импорт main: {summary['import']:.3f} с, окно: {summary['window']:.3f} с, "
+          f"всего (с запуском Python): {summary['total']:.3f} с (медиана {len(runs)} замеров)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"median": summary, "runs": runs, "loaded": loaded}, f, ensure_ascii=False, indent=2)
+
+    failed = False
+    if loaded:
+        print(f"❌ При запуске загружены модули, которые должны загружаться позже: {', '.join(loaded)}")
+        failed = True
+    if summary["total"] > args.max_seconds:
+        print(f"❌ Запуск дольше {args.max_seconds} с")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
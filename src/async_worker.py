@@ -0,0 +1,80 @@
+"""Фоновый поток с постоянным циклом событий asyncio"""
+import asyncio
+import threading
+
+
+class AsyncWorker:
+    """Поток с долгоживущим циклом событий.
+
+    Корутины передаются в цикл из любого потока через submit(), результат
+    доступен через concurrent.futures.Future. Если установлен uvloop, цикл
+    создается на нем. Перед остановкой выполняются корутины из
+    shutdown_hooks (например, отключение клиентов).
+    """
+
+    def __init__(self, name="telegram-worker", use_uvloop=True):
+        self.name = name
+        self.use_uvloop = use_uvloop
+        self.loop = None
+        self.shutdown_hooks = []
+        self._thread = None
+        self._ready = threading.Event()
+
+    def _new_loop(self):
+        if self.use_uvloop:
+            try:
+                import uvloop
+                return uvloop.new_event_loop()
+            except ImportError:
+                pass
+        return asyncio.new_event_loop()
+
+    def start(self):
+        """Запуск потока и ожидание готовности цикла"""
+        if self.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = self._new_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Отменяем оставшиеся задачи и закрываем цикл
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro):
+        """Запуск корутины в цикле воркера, возвращает concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout=5):
+        """Выполнение shutdown_hooks и остановка цикла"""
+        if not self.is_alive():
+            return
+
+        async def shutdown():
+            for hook in self.shutdown_hooks:
+                try:
+                    await hook()
+                except Exception:
+                    pass
+
+        try:
+            self.submit(shutdown()).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
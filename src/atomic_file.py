@@ -0,0 +1,21 @@
+"""Запись файла целиком: во временный файл рядом и затем переименование.
+
+Читатели (коллектор Prometheus, следующий запуск) не видят файл
+записанным наполовину, а прерванная запись оставляет прежний файл.
+"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    """Файл для записи вместо path (аргументы как у open); path подменяется после успешной записи"""
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
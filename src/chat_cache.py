@@ -0,0 +1,91 @@
+"""Кэш разрешения ссылок на группы (имя -> id, access_hash, название, число участников).
+
+Повторный парсинг тех же групп обходится без запросов get_chat: данные
+группы берутся из кэша, а пир записывается в хранилище сессии pyrogram.
+access_hash действителен только для аккаунта, который его получил,
+поэтому записи хранятся отдельно для каждой сессии.
+"""
+import json
+import time
+from typing import NamedTuple
+
+from atomic_file import atomic_write
+
+
+DEFAULT_CHAT_CACHE_PATH = "chat_cache.json"
+# Сколько секунд запись кэша считается актуальной
+DEFAULT_CHAT_CACHE_TTL = 24 * 60 * 60
+
+
+class ResolvedChat(NamedTuple):
+    """Группа, найденная по ссылке"""
+    id: int
+    access_hash: int
+    peer_type: str  # Тип пира в хранилище pyrogram: group / supergroup / channel
+    title: str
+    members_count: int
+    resolved_at: float
+
+
+class ChatCache:
+    """Кэш групп в JSON-файле: сессия -> имя группы -> ResolvedChat.
+
+    Имена сравниваются без учета регистра. Записи старше ttl секунд не
+    используются. Изменения сохраняются на диск вызовом save().
+    """
+
+    def __init__(self, path=DEFAULT_CHAT_CACHE_PATH, ttl=DEFAULT_CHAT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self._dirty = False
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = {
+                session: {name: ResolvedChat(**entry) for name, entry in chats.items()}
+                for session, chats in data.items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Нет файла или он поврежден - начинаем с пустого кэша
+            self.entries = {}
+
+    @staticmethod
+    def key(username):
+        return username.lower()
+
+    def get(self, session_name, username):
+        """Актуальная запись о группе или None"""
+        chat = self.entries.get(session_name, {}).get(self.key(username))
+        if chat is None or time.time() - chat.resolved_at > self.ttl:
+            return None
+        return chat
+
+    def put(self, session_name, username, chat):
+        self.entries.setdefault(session_name, {})[self.key(username)] = chat
+        self._dirty = True
+
+    def invalidate(self, session_name, username):
+        """Удаление записи (например, после ошибки при работе с группой)"""
+        if self.entries.get(session_name, {}).pop(self.key(username), None) is not None:
+            self._dirty = True
+
+    def clear(self, session_name=None):
+        """Очистка кэша сессии (или всего кэша)"""
+        if session_name is None:
+            self.entries = {}
+        else:
+            self.entries.pop(session_name, None)
+        self._dirty = True
+        self.save()
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {
+            session: {name: chat._asdict() for name, chat in chats.items()}
+            for session, chats in self.entries.items() if chats
+        }
+        with atomic_write(self.path, encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._dirty = False
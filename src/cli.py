@@ -0,0 +1,312 @@
+"""Консольный запуск парсинга без графического интерфейса (PyQt6 не импортируется).
+
+NumPy (сравнение запусков, снимки результатов) загружается только
+командами и параметрами, которым он нужен.
+
+Пример:
+    python src/cli.py parse --api-id 123 --api-hash abc --chat @python_beginners --out members.csv
+
+API ID и Hash можно передать через переменные окружения TG_API_ID и TG_API_HASH.
+"""
+import argparse
+import asyncio
+import getpass
+import json
+import os
+import signal
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from chat_cache import DEFAULT_CHAT_CACHE_PATH, ChatCache
+from exporters import ExportWorker, exporter_for_path
+from metrics import RunMetrics
+from parser_core import (DEFAULT_JOB_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_SESSION_NAME,
+                         MEMBER_FILTERS, TelegramParser, normalize_chat_link, split_chat_links)
+from profiling import RunProfiler
+
+
+class ConsoleReporter:
+    """Вывод хода парсинга в stdout: текстом или JSON Lines (--json)"""
+
+    def __init__(self, json_output=False):
+        self.json_output = json_output
+
+    def event(self, name, message, **data):
+        if self.json_output:
+            record = {"event": name, "time": datetime.now().isoformat(timespec="seconds"),
+                      "message": message, **data}
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def job_output_path(out, chat_link, jobs):
+    """Файл результатов группы: при нескольких группах к имени добавляется группа"""
+    if jobs == 1:
+        return out
+    gzip_suffix = ".gz" if out.endswith(".gz") else ""
+    base = out[:-len(gzip_suffix)] if gzip_suffix else out
+    extension = exporter_for_path(out).extension
+    if base.endswith(extension):
+        base = base[:-len(extension)]
+    return f"{base}_{normalize_chat_link(chat_link)}{extension}{gzip_suffix}"
+
+
+def profile_path_prefix(out):
+    """Файлы профиля рядом с файлом результатов: <имя>_profile.prof и <имя>_profile_alloc.txt"""
+    base = out[:-3] if out.endswith(".gz") else out
+    return f"{os.path.splitext(base)[0]}_profile"
+
+
+def snapshot_path(out):
+    """Снимок результатов рядом с файлом результатов группы: <имя>.tgsnap"""
+    from snapshot import SNAPSHOT_EXTENSION
+
+    base = out[:-3] if out.endswith(".gz") else out
+    return f"{os.path.splitext(base)[0]}{SNAPSHOT_EXTENSION}"
+
+
+def ask_in_background(parser, prompt, secret=False):
+    """Чтение ответа пользователя в отдельном потоке, чтобы не блокировать цикл событий"""
+
+    def read():
+        if secret:
+            value = getpass.getpass(f"{prompt}: ")
+        else:
+            # Подсказка в stderr, чтобы не смешивать ее с выводом --json
+            print(f"{prompt}: ", end="", file=sys.stderr, flush=True)
+            value = sys.__stdin__.readline()
+        parser.provide_auth_input(value.strip())
+
+    threading.Thread(target=read, daemon=True).start()
+
+
+async def run_parser(parser):
+    loop = asyncio.get_running_loop()
+
+    def interrupt():
+        # Повторный Ctrl+C прерывает работу сразу (KeyboardInterrupt)
+        loop.remove_signal_handler(signal.SIGINT)
+        parser.stop()
+
+    try:
+        # Ctrl+C останавливает парсинг как кнопка «Стоп»: итог придет через stopped_signal
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except NotImplementedError:
+        pass  # Windows: остается KeyboardInterrupt
+    try:
+        await parser.run()
+    finally:
+        await parser.client_cache.close()
+
+
+def save_metrics(metrics, args, reporter):
+    """Сохранение метрик запуска в файлы, указанные в --metrics-json / --metrics-prom"""
+    try:
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+    except OSError as e:
+        reporter.event("error", f"⚠️ Не удалось сохранить метрики: {e}")
+
+
+def parse_command(args):
+    chat_links = list(args.chat or [])
+    if args.chats_file:
+        with open(args.chats_file, encoding='utf-8') as f:
+            chat_links += split_chat_links(f.read())
+    chat_links = split_chat_links(" ".join(chat_links))
+    if not chat_links:
+        raise SystemExit("Укажите группы через --chat или --chats-file")
+    if not args.api_id or not args.api_hash:
+        raise SystemExit("Укажите --api-id и --api-hash (или TG_API_ID / TG_API_HASH)")
+
+    reporter = ConsoleReporter(args.json)
+    metrics = RunMetrics()
+    parser = TelegramParser(
+        args.api_id,
+        args.api_hash,
+        chat_links,
+        args.limit,
+        args.session,
+        args.rpm,
+        args.store,
+        args.concurrency,
+        metrics=metrics,
+        chat_cache=None if args.no_chat_cache else ChatCache(args.chat_cache),
+        member_filter=MEMBER_FILTERS[args.filter][1],
+        query=args.query,
+        profiler=RunProfiler(profile_path_prefix(args.out)) if args.profile else None
+    )
+
+    exporter_class = exporter_for_path(args.out)
+    exports = {}
+    snapshots = {}  # Номер задачи -> (колонки результатов, индекс поиска, файл снимка, ссылка на группу)
+    failed = []
+
+    def job_started(job, chat_link):
+        path = job_output_path(args.out, chat_link, len(chat_links))
+        exporter = exporter_class(path, gzip_output=args.gzip or args.out.endswith(".gz"),
+                                  rows_per_file=args.rows_per_file)
+        exports[job] = ExportWorker(exporter, metrics=metrics)
+        exports[job].start()
+        if args.snapshot:
+            from member_columns import MemberColumns
+            from search_index import TrigramIndex
+            snapshots[job] = (MemberColumns(), TrigramIndex(), snapshot_path(path), chat_link)
+        reporter.event("job_started", f"▶️ {chat_link}", job=job, chat=chat_link)
+
+    def batch(job, rows):
+        exports[job].submit(rows)
+        if job in snapshots:
+            snapshots[job][0].append(rows)
+            snapshots[job][1].add(rows)
+
+    def save_job_snapshot(job, title):
+        from snapshot import save_snapshot
+
+        columns, search_index, path, chat_link = snapshots.pop(job)
+        try:
+            with metrics.timer("snapshot_save"):
+                save_snapshot(path, columns, search_index, title=title, chat=chat_link)
+        except OSError as e:
+            failed.append(None)
+            reporter.event("error", f"⚠️ Не удалось сохранить снимок: {e}")
+            return
+        reporter.event("snapshot", f"📦 Снимок результатов: {path}", job=job, file=path)
+
+    def job_finished(job, title, total):
+        exports[job].finish()
+        if job in snapshots:
+            save_job_snapshot(job, title)
+        reporter.event("job_finished", f"✅ {title}: {total} участников", job=job, title=title,
+                       total=total, files=exports[job].exporter.paths)
+
+    def job_failed(job, message):
+        failed.append(job)
+        if job in exports:
+            exports[job].finish()
+        snapshots.pop(job, None)
+        reporter.event("job_failed", message, job=job)
+
+    def stopped(total):
+        reporter.event("stopped", f"⏹️ Парсинг остановлен, получено {total} участников", total=total)
+
+    def error(message):
+        failed.append(None)
+        reporter.event("error", message)
+
+    parser.progress_signal.connect(lambda message: reporter.event("progress", message))
+    parser.job_started.connect(job_started)
+    parser.batch_signal.connect(batch)
+    parser.job_finished.connect(job_finished)
+    parser.job_failed.connect(job_failed)
+    parser.finished_signal.connect(
+        lambda total: reporter.event("finished", f"✅ Парсинг завершен! Получено {total} участников", total=total)
+    )
+    parser.stopped_signal.connect(stopped)
+    parser.error_signal.connect(error)
+    parser.auth_code_needed.connect(lambda prompt: ask_in_background(parser, prompt))
+    parser.auth_password_needed.connect(
+        lambda: ask_in_background(parser, "Пароль двухфакторной аутентификации", secret=True)
+    )
+
+    try:
+        asyncio.run(run_parser(parser))
+    except KeyboardInterrupt:
+        # asyncio.run уже отменил задачу и закрыл цикл, stopped_signal не придет
+        parser.stop()
+        stopped(sum(parser.job_totals.values()))
+    finally:
+        # Дописываем уже полученные данные
+        for export in exports.values():
+            export.finish()
+            export.join()
+            if export.error:
+                failed.append(None)
+                reporter.event("error", f"❌ Не удалось сохранить файл: {export.error}")
+        # Группы, прерванные остановкой, сохраняются с тем, что успели получить
+        for job, (columns, _, _, chat_link) in list(snapshots.items()):
+            if len(columns):
+                save_job_snapshot(job, chat_link)
+        reporter.event("stats", "📊 Состав участников:\n" + "\n".join(metrics.members.format_lines()),
+                       members=metrics.members.snapshot())
+        save_metrics(metrics, args, reporter)
+
+    return 1 if failed else 0
+
+
+def diff_command(args):
+    from run_diff import diff_runs, load_records, write_delta
+
+    try:
+        diff = diff_runs(load_records(args.old), load_records(args.new))
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        raise SystemExit(f"Не удалось загрузить результаты: {e}")
+    reporter = ConsoleReporter(args.json)
+    reporter.event("diff", f"🔀 {diff.describe()}", old=diff.old_count, new=diff.new_count,
+                   joined=len(diff.joined), left=len(diff.left), changed=len(diff.changed))
+    if args.out:
+        try:
+            write_delta(args.out, diff)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Не удалось сохранить изменения: {e}")
+        reporter.event("saved", f"💾 Изменения сохранены: {args.out}", file=args.out)
+    return 0
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(description="Парсер участников Telegram групп")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="Получить участников групп и сохранить в файл")
+    parse.add_argument("--chat", action="append", help="Ссылка на группу (можно указать несколько раз)")
+    parse.add_argument("--chats-file", help="Файл со списком ссылок (по одной на строке)")
+    parse.add_argument("--out", required=True,
+                       help="Файл результатов: .csv, .jsonl или .db (при нескольких группах - по файлу на группу)")
+    parse.add_argument("--api-id", default=os.environ.get("TG_API_ID"))
+    parse.add_argument("--api-hash", default=os.environ.get("TG_API_HASH"))
+    parse.add_argument("--session", default=DEFAULT_SESSION_NAME, help="Имя файла сессии Telegram")
+    parse.add_argument("--limit", type=int, default=1000, help="Макс. участников на группу (0 - все)")
+    parse.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="Запросов в минуту")
+    parse.add_argument("--concurrency", type=int, default=DEFAULT_JOB_CONCURRENCY, help="Групп одновременно")
+    parse.add_argument("--filter", choices=MEMBER_FILTERS, default="all",
+                       help="Отбор участников на сервере: " + ", ".join(
+                           f"{key} - {label.lower()}" for key, (label, _) in MEMBER_FILTERS.items()))
+    parse.add_argument("--query", default="", help="Поиск участников на сервере по имени или username "
+                                                   "(для all, restricted, banned)")
+    parse.add_argument("--store", help="Локальная база участников для инкрементальной синхронизации")
+    parse.add_argument("--chat-cache", default=DEFAULT_CHAT_CACHE_PATH, help="Файл кэша найденных групп")
+    parse.add_argument("--no-chat-cache", action="store_true", help="Всегда запрашивать группы у сервера")
+    parse.add_argument("--gzip", action="store_true", help="Сжимать CSV / JSON Lines")
+    parse.add_argument("--rows-per-file", type=int, default=0, help="Строк в одном файле (0 - без ограничения)")
+    parse.add_argument("--json", action="store_true", help="Выводить ход работы в формате JSON Lines")
+    parse.add_argument("--metrics-json", help="Файл для итоговых метрик запуска (JSON)")
+    parse.add_argument("--profile", action="store_true",
+                       help="Профилировать запуск: .prof и отчет о памяти рядом с файлом результатов")
+    parse.add_argument("--snapshot", action="store_true",
+                       help="Сохранить и снимок результатов (.tgsnap) рядом с файлом результатов - "
+                            "открывается в GUI кнопкой «Открыть снимок»")
+    parse.add_argument("--metrics-prom", help="Файл метрик в формате Prometheus (textfile collector)")
+    parse.set_defaults(handler=parse_command)
+
+    diff = commands.add_parser("diff", help="Сравнить два запуска одной группы (вступившие, ушедшие, статусы)")
+    diff.add_argument("old", help="Результаты предыдущего запуска: .csv, .jsonl (можно .gz), .db или .tgsnap")
+    diff.add_argument("new", help="Результаты нового запуска")
+    diff.add_argument("--out", help="Файл изменений: .csv или .jsonl (можно .gz)")
+    diff.add_argument("--json", action="store_true", help="Выводить итог в формате JSON Lines")
+    diff.set_defaults(handler=diff_command)
+
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Экспорт результатов парсинга (CSV, JSON Lines, SQLite) в фоновом потоке"""
+import csv
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from functools import partial
+
+from records import COLUMNS, FLAG_BOT, FLAG_PREMIUM, FLAG_SCAM, FLAG_VERIFIED, flag_value, format_row
+
+
+# Как часто фоновый экспорт сбрасывает данные на диск (секунды)
+EXPORT_FLUSH_INTERVAL = 1.0
+# Размер пачки при выгрузке уже накопленных строк в экспорт
+EXPORT_CHUNK_SIZE = 5000
+
+
+class Exporter:
+    """Базовый класс экспорта: принимает записи участников (records.MemberRecord) пачками"""
+    extension = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.paths = []
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        """Запись пачки записей"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Сброс накопленных данных на диск"""
+
+    def close(self):
+        """Завершение записи"""
+
+
+class RotatingFileExporter(Exporter):
+    """Текстовый экспорт с ротацией файлов и опциональным gzip"""
+
+    def __init__(self, path, gzip_output=False, rows_per_file=0):
+        if gzip_output and not path.endswith(".gz"):
+            path += ".gz"
+        super().__init__(path)
+        self.gzip_output = gzip_output
+        self.rows_per_file = rows_per_file  # 0 - без ротации
+        self._file = None
+        self._rows_in_file = 0
+
+    def _part_path(self, part):
+        """Имя файла для части с номером part (первая часть - исходное имя)"""
+        if part == 1:
+            return self.path
+        root, ext = self.path, ""
+        for suffix in (".gz", self.extension):
+            if root.endswith(suffix):
+                root, ext = root[:-len(suffix)], suffix + ext
+        return f"{root}_part{part}{ext}"
+
+    def _open_next(self):
+        self._close_file()
+        path = self._part_path(len(self.paths) + 1)
+        if self.gzip_output:
+            self._file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._rows_in_file = 0
+        self.paths.append(path)
+        self._start_file(self._file)
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _start_file(self, file):
+        """Начало очередного файла (например, заголовок)"""
+
+    def _write(self, rows):
+        raise NotImplementedError
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+
+        start = 0
+        while start < len(rows):
+            if self._file is None or (self.rows_per_file and self._rows_in_file >= self.rows_per_file):
+                self._open_next()
+            end = len(rows)
+            if self.rows_per_file:
+                end = min(end, start + self.rows_per_file - self._rows_in_file)
+            self._write(rows[start:end])
+            self._rows_in_file += end - start
+            self.rows_written += end - start
+            start = end
+
+    def flush(self):
+        # Для gzip сброс завершает блок сжатия, и файл читается до этого места
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        self._close_file()
+
+
+class CsvExporter(RotatingFileExporter):
+    """Экспорт в CSV"""
+    extension = ".csv"
+
+    def __init__(self, path, gzip_output=False, rows_per_file=0):
+        super().__init__(path, gzip_output, rows_per_file)
+        self._writer = None
+
+    def _start_file(self, file):
+        self._writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        self._writer.writeheader()
+
+    def _write(self, rows):
+        self._writer.writerows(map(format_row, rows))
+
+
+class JsonLinesExporter(RotatingFileExporter):
+    """Экспорт в JSON Lines (одна строка - один участник)"""
+    extension = ".jsonl"
+
+    def _write(self, rows):
+        self._file.write("".join(json.dumps(format_row(row), ensure_ascii=False) + "\n" for row in rows))
+
+
+class SqliteExporter(Exporter):
+    """Экспорт в базу SQLite.
+
+    Пачки вставляются через executemany, каждая в своей транзакции.
+    Значения пишутся типизированными: время последнего посещения -
+    unix-время, флаги - 0/1 (NULL, если неизвестны), статус - код
+    records.MemberStatus по имени. База работает в режиме WAL. Индексы по ID и username строятся
+    один раз после загрузки. Соединение открывается при первой записи,
+    то есть в потоке экспорта.
+    """
+    extension = ".db"
+    table = "members"
+
+    # Колонка -> (тип, значение из записи)
+    columns = {
+        'id': ('INTEGER', lambda r: r.id),
+        'username': ('TEXT', lambda r: r.username),
+        'first_name': ('TEXT', lambda r: r.first_name),
+        'last_name': ('TEXT', lambda r: r.last_name),
+        'phone': ('TEXT', lambda r: r.phone),
+        'status': ('TEXT', lambda r: r.status.name),
+        'last_online': ('INTEGER', lambda r: r.last_online or None),
+        'is_bot': ('INTEGER', lambda r: flag_value(r, FLAG_BOT, 1, 0, None)),
+        'is_verified': ('INTEGER', lambda r: flag_value(r, FLAG_VERIFIED, 1, 0, None)),
+        'is_scam': ('INTEGER', lambda r: flag_value(r, FLAG_SCAM, 1, 0, None)),
+        'is_premium': ('INTEGER', lambda r: flag_value(r, FLAG_PREMIUM, 1, 0, None)),
+    }
+
+    def __init__(self, path, gzip_output=False, rows_per_file=0):
+        super().__init__(path)
+        self._conn = None
+        self._insert_sql = None
+
+    def _open(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        definitions = ", ".join(f'"{column}" {sql_type}' for column, (sql_type, _) in self.columns.items())
+        self._conn.execute(f'CREATE TABLE "{self.table}" ({definitions})')
+        self._conn.commit()
+        self._insert_sql = (
+            f'INSERT INTO "{self.table}" VALUES ({", ".join("?" for _ in self.columns)})'
+        )
+        self.paths.append(self.path)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self._conn is None:
+            self._open()
+
+        getters = [getter for _, getter in self.columns.values()]
+        with self._conn:
+            self._conn.executemany(
+                self._insert_sql, ([getter(record) for getter in getters] for record in rows)
+            )
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            for column in ("id", "username"):
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{self.table}_{column}" '
+                    f'ON "{self.table}" ("{column}")'
+                )
+            self._conn.commit()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+# Доступные форматы экспорта: название -> класс
+EXPORTERS = {
+    "CSV": CsvExporter,
+    "JSON Lines": JsonLinesExporter,
+    "SQLite": SqliteExporter,
+}
+
+
+def exporter_for_path(path):
+    """Класс экспорта по расширению файла (по умолчанию CSV)"""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for exporter_class in EXPORTERS.values():
+        if name.endswith(exporter_class.extension):
+            return exporter_class
+    if name.endswith(".sqlite"):
+        return SqliteExporter
+    return CsvExporter
+
+
+class ExportWorker(threading.Thread):
+    """Фоновый поток, дописывающий пачки строк в экспорт.
+
+    Пачки передаются через submit() из любого потока. Данные сбрасываются
+    на диск не реже чем раз в flush_interval секунд, поэтому при аварийном
+    завершении теряется не больше последнего интервала. По окончании
+    вызывается on_done(описание, текст ошибки или ""). Если передан
+    metrics (metrics.RunMetrics), в него пишутся время записи, число строк
+    и размер файлов.
+    """
+
+    def __init__(self, exporter, flush_interval=EXPORT_FLUSH_INTERVAL, on_done=None, metrics=None):
+        super().__init__(daemon=True)
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self.on_done = on_done
+        self.metrics = metrics
+        self.error = None
+        self._queue = queue.Queue()
+
+    def submit(self, rows):
+        """Добавление пачки записей в очередь записи"""
+        if rows:
+            self._queue.put(rows)
+
+    def submit_columns(self, columns, rows=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Добавление строк колоночного хранилища (member_columns.MemberColumns).
+
+        Записи собираются из колонок уже в потоке экспорта, по пачке за
+        раз, поэтому вызывающий поток не ждет разбора сотен тысяч строк.
+        rows - номера строк (None - все строки на момент вызова).
+        """
+        rows = range(len(columns)) if rows is None else rows
+        for start in range(0, len(rows), chunk_size):
+            self._queue.put(partial(columns.records, rows[start:start + chunk_size]))
+
+    def finish(self):
+        """Завершение экспорта после записи всех поставленных пачек"""
+        self._queue.put(None)
+
+    def bytes_written(self):
+        """Размер записанных файлов"""
+        return sum(os.path.getsize(path) for path in self.exporter.paths if os.path.exists(path))
+
+    def describe(self):
+        paths = self.exporter.paths or [self.exporter.path]
+        return f"{', '.join(paths)} ({self.exporter.rows_written} строк)"
+
+    def run(self):
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    rows = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    rows = ()
+                if rows is None:
+                    break
+                started = time.perf_counter()
+                if callable(rows):
+                    rows = rows()  # Пачка из submit_columns
+                self.exporter.write_rows(rows)
+
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    self.exporter.flush()
+                    last_flush = time.monotonic()
+                if self.metrics and rows:
+                    self.metrics.add_time("export_write", time.perf_counter() - started)
+                    self.metrics.inc("export_rows", len(rows))
+        except Exception as e:
+            self.error = e
+        finally:
+            started = time.perf_counter()
+            try:
+                self.exporter.close()
+            except Exception as e:
+                self.error = self.error or e
+            if self.metrics:
+                self.metrics.add_time("export_write", time.perf_counter() - started)
+                self.metrics.inc("export_bytes", self.bytes_written())
+
+        if self.on_done:
+            self.on_done(self.describe(), str(self.error) if self.error else "")
@@ -1,347 +1,197 @@
 import sys
 import os
-import asyncio
 import logging
-import csv
+import threading
+import time
 import webbrowser
 from datetime import datetime
 from pathlib import Path
-from io import StringIO
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-                             QWidget, QPushButton, QLineEdit, QTextEdit, QLabel,
+                             QWidget, QPushButton, QLineEdit, QLabel,
                              QProgressBar, QFileDialog, QGroupBox, QFormLayout,
-                             QMessageBox, QTabWidget, QTableWidget, QTableWidgetItem,
-                             QDialog, QDialogButtonBox, QInputDialog)
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
-from PyQt6.QtGui import QFont, QIcon
-from pyrogram import Client
-from pyrogram.errors import FloodWait, UserPrivacyRestricted, ChatAdminRequired
-from pyrogram.enums import UserStatus
+                             QMessageBox, QTabWidget, QTableView, QHeaderView,
+                             QInputDialog, QCheckBox, QSpinBox,
+                             QPlainTextEdit, QComboBox)
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+# pyrogram (через parser_core), NumPy и модель результатов импортируются
+# при первом использовании, чтобы окно появлялось сразу
+from async_worker import AsyncWorker
+from chat_cache import ChatCache
+from exporters import EXPORTERS, ExportWorker, exporter_for_path
+from member_store import DEFAULT_STORE_PATH
+from metrics import RunMetrics
+from parser_core import (DEFAULT_JOB_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_SESSION_NAME,
+                         MEMBER_FILTERS, QUERY_FILTERS, TelegramClientCache, TelegramParser, normalize_chat_link,
+                         split_chat_links)
+from profiling import RunProfiler
+
+
+# Сколько строк учитывается при подборе ширины колонок таблицы результатов
+COLUMN_WIDTH_SAMPLE_ROWS = 200
+# Как часто накопленные сообщения о ходе парсинга выводятся в лог (мс)
+STATUS_FLUSH_INTERVAL_MS = 100
+# Сколько последних строк хранит лог на вкладке парсинга
+STATUS_LOG_MAX_BLOCKS = 1000
+# Задержка поиска после ввода (мс), чтобы не искать на каждую букву
+SEARCH_DELAY_MS = 150
+# Как часто обновляется панель метрик во время парсинга (мс)
+METRICS_REFRESH_INTERVAL_MS = 1000
+# Файл метрик для textfile collector Prometheus (перезаписывается каждым запуском)
+PROMETHEUS_FILE_NAME = "telegram_parser.prom"
+
+# Стиль приложения (задается до создания окна, чтобы виджеты оформлялись один раз)
+APP_STYLE_SHEET = """
+QMainWindow {
+    background-color: #f5f5f5;
+}
+QGroupBox {
+    font-weight: bold;
+    border: 2px solid #ccc;
+    border-radius: 5px;
+    margin: 10px 0px;
+    padding-top: 10px;
+}
+QGroupBox::title {
+    subcontrol-origin: margin;
+    left: 10px;
+    padding: 0 5px 0 5px;
+}
+QPushButton {
+    border: none;
+    padding: 8px 16px;
+    border-radius: 4px;
+    font-weight: bold;
+}
+QPushButton:hover {
+    opacity: 0.8;
+}
+QLineEdit {
+    padding: 8px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+}
+QTextEdit, QPlainTextEdit {
+    border: 1px solid #ddd;
+    border-radius: 4px;
+}
+QTableView {
+    gridline-color: #ddd;
+    background-color: white;
+}
+QTableView::item {
+    padding: 5px;
+}
+QTableView::item:selected {
+    background-color: #3498db;
+    color: white;
+}
+"""
+
+
+class ProgressLog:
+    """Буфер сообщений о ходе парсинга.
+
+    Пополняется из любого потока без прохода через очередь событий Qt,
+    GUI забирает накопленные строки по таймеру одной пачкой.
+    """
 
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def append(self, message):
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        with self._lock:
+            self._pending.append(line)
+
+    def drain(self):
+        """Все накопленные строки (буфер очищается)"""
+        with self._lock:
+            lines, self._pending = self._pending, []
+        return lines
 
 
-class TelegramParserThread(QThread):
-    """Поток для парсинга Telegram групп"""
+class TelegramParserTask(QObject):
+    """Qt-обертка над TelegramParser: сигналы ядра передаются в GUI как pyqtSignal.
+
+    Если передан progress_log, сообщения о ходе парсинга складываются в него
+    напрямую из потока воркера, а не отправляются сигналом по одному.
+    """
     progress_signal = pyqtSignal(str)
     progress_value = pyqtSignal(int)
-    finished_signal = pyqtSignal(str, list)
+    job_started = pyqtSignal(int, str)  # Номер задачи, ссылка
+    batch_signal = pyqtSignal(int, list)  # Номер задачи, пачка обработанных участников
+    job_finished = pyqtSignal(int, str, int)  # Номер задачи, название группы, число участников
+    job_failed = pyqtSignal(int, str)  # Номер задачи, текст ошибки
+    finished_signal = pyqtSignal(int)  # Всего участников по всем задачам
+    stopped_signal = pyqtSignal(int)  # Остановлено: участников получено до остановки
     error_signal = pyqtSignal(str)
     auth_code_needed = pyqtSignal(str)  # Сигнал для запроса кода
     auth_password_needed = pyqtSignal()  # Сигнал для запроса пароля
 
-    def __init__(self, api_id, api_hash, chat_link, max_members=1000, session_name=None):
+    def __init__(self, *args, progress_log=None, **kwargs):
         super().__init__()
-        self.api_id = api_id
-        self.api_hash = api_hash
-        self.chat_link = chat_link
-        self.max_members = max_members
-        self.client = None
-        self.auth_code = None
-        self.auth_password = None
-        self.session_name = session_name or "telegram_parser_session"
-        self.is_running = True
-
-    def format_last_online(self, user):
-        """Форматирование времени последнего посещения"""
-        try:
-            if not hasattr(user, 'status') or user.status is None:
-                return "Скрыто"
-            
-            # Проверяем значение enum статуса
-            if user.status == UserStatus.ONLINE:
-                return "Онлайн"
-            elif user.status == UserStatus.OFFLINE:
-                # Пытаемся получить точное время из last_online_date
-                if hasattr(user, 'last_online_date') and user.last_online_date:
-                    return user.last_online_date.strftime("%Y-%m-%d %H:%M:%S")
-                return "Не в сети"
-            elif user.status == UserStatus.RECENTLY:
-                return "Недавно"
-            elif user.status == UserStatus.LAST_WEEK:
-                return "На прошлой неделе"  
-            elif user.status == UserStatus.LAST_MONTH:
-                return "В прошлом месяце"
-            elif user.status == UserStatus.LONG_TIME_AGO:
-                return "Давно"
-            else:
-                return "Скрыто"
-                
-        except Exception as e:
-            return "Скрыто"
-
-    def get_user_status(self, user):
-        """Получение текстового статуса пользователя"""
-        return self.format_last_online(user)
-
-    async def safe_get_chat_members(self, client, chat_id, limit=None):
-        """Безопасное получение участников чата"""
-        members = []
-        try:
-            async for member in client.get_chat_members(chat_id, limit=limit):
-                if not self.is_running:  # Проверка на остановку
-                    break
-
-                members.append(member)
-                await asyncio.sleep(0.1)
-
-                # Обновляем прогресс
-                if len(members) % 50 == 0:
-                    self.progress_signal.emit(f"📥 Получено участников: {len(members)}")
-                    self.progress_value.emit(min(len(members), limit or 1000))
-
-        except FloodWait as e:
-            if self.is_running:
-                self.progress_signal.emit(f"⏳ FloodWait: ожидание {e.value} сек")
-                await asyncio.sleep(e.value)
-                return await self.safe_get_chat_members(client, chat_id, limit)
+        self.parser = TelegramParser(*args, **kwargs)
+        for name in TelegramParser.SIGNALS:
+            if name == 'progress_signal' and progress_log is not None:
+                self.parser.progress_signal.connect(progress_log.append)
             else:
-                return None
-        except ChatAdminRequired:
-            self.error_signal.emit("❌ Требуются права администратора")
-            return None
-        except Exception as e:
-            self.error_signal.emit(f"❌ Ошибка получения участников: {str(e)}")
-            return None
-        return members
-
-    async def ensure_auth(self):
-        """Обеспечиваем авторизацию клиента"""
-        try:
-            # Проверяем авторизацию
-            me = await self.client.get_me()
-            self.progress_signal.emit(f"✅ Авторизован как: {me.first_name}")
-            return True
-        except Exception:
-            self.progress_signal.emit("📱 Требуется авторизация...")
-
-            # Запрашиваем номер телефона
-            self.auth_code_needed.emit("Введите номер телефона (например: +1234567890)")
-            while self.auth_code is None and self.is_running:
-                await asyncio.sleep(0.1)
-
-            if not self.is_running:
-                return False
-
-            phone = self.auth_code.strip()
-            self.auth_code = None
-
-            # Отправляем код
-            self.progress_signal.emit(f"📤 Отправляем код на {phone}...")
-            try:
-                sent_code = await self.client.send_code(phone)
-            except Exception as e:
-                raise Exception(f"Не удалось отправить код: {str(e)}")
-
-            # Запрашиваем код подтверждения
-            self.auth_code_needed.emit(f"Введите код из SMS/Telegram для {phone}")
-            while self.auth_code is None and self.is_running:
-                await asyncio.sleep(0.1)
-
-            if not self.is_running:
-                return False
-
-            code = self.auth_code.strip()
-            self.auth_code = None
-
-            try:
-                # Пробуем войти с кодом
-                await self.client.sign_in(phone, sent_code.phone_code_hash, code)
-                self.progress_signal.emit("✅ Авторизация успешна")
-                return True
-            except Exception as sign_error:
-                error_str = str(sign_error).lower()
-                if "password" in error_str or "2fa" in error_str or "two-step" in error_str:
-                    # Нужен пароль 2FA
-                    self.progress_signal.emit("🔐 Требуется пароль 2FA...")
-                    self.auth_password_needed.emit()
-                    while self.auth_password is None and self.is_running:
-                        await asyncio.sleep(0.1)
-
-                    if not self.is_running:
-                        return False
-
-                    try:
-                        await self.client.check_password(self.auth_password)
-                        self.progress_signal.emit("✅ Авторизация с 2FA успешна")
-                        return True
-                    except Exception as pwd_error:
-                        raise Exception(f"Неверный пароль 2FA: {str(pwd_error)}")
-                else:
-                    raise Exception(f"Ошибка авторизации: {str(sign_error)}")
-
-    async def parse_group(self):
-        """Основная функция парсинга"""
-        old_stdin = sys.stdin
-        try:
-            if not self.is_running:
-                return
-
-            self.progress_signal.emit("🔄 Инициализация клиента...")
-
-            # Перенаправляем stdin чтобы избежать консольного ввода
-            sys.stdin = StringIO("")
-
-            # Создаем или используем существующую сессию
-            self.client = Client(
-                self.session_name,
-                api_id=int(self.api_id),
-                api_hash=self.api_hash,
-                in_memory=False,
-                no_updates=True
-            )
-
-            self.progress_signal.emit("🔐 Подключение к Telegram...")
-            await self.client.connect()
-
-            if not self.is_running:
-                return
-
-            # Проверяем/выполняем авторизацию
-            if not await self.ensure_auth():
-                return
-
-            if not self.is_running:
-                return
-
-            # Получаем информацию о чате
-            self.progress_signal.emit("🔍 Получение информации о группе...")
-
-            # Обрабатываем разные форматы ссылок
-            chat_link = self.chat_link.strip()
-            if chat_link.startswith("https://t.me/"):
-                chat_username = chat_link.replace("https://t.me/", "")
-            elif chat_link.startswith("@"):
-                chat_username = chat_link[1:]  # Убираем @
-            elif chat_link.startswith("t.me/"):
-                chat_username = chat_link.replace("t.me/", "")
-            else:
-                chat_username = chat_link
-
-            # Убираем лишние символы и параметры
-            if "/" in chat_username:
-                chat_username = chat_username.split("/")[0]
-            if "?" in chat_username:
-                chat_username = chat_username.split("?")[0]
-
-            self.progress_signal.emit(f"🔍 Поиск группы: @{chat_username}")
-
-            try:
-                chat = await self.client.get_chat(chat_username)
-            except Exception as e:
-                if "USERNAME_INVALID" in str(e):
-                    # Пробуем с @ в начале
-                    try:
-                        chat = await self.client.get_chat(f"@{chat_username}")
-                    except Exception as e2:
-                        raise Exception(f"Группа не найдена. Проверьте ссылку: {chat_link}\nОшибка: {str(e)}")
-                else:
-                    raise e
+                getattr(self.parser, name).connect(getattr(self, name).emit)
 
-            if not self.is_running:
-                return
-
-            self.progress_signal.emit(f"📊 Группа: {chat.title}")
-            self.progress_signal.emit(f"👥 Участников: {chat.members_count or 'Неизвестно'}")
-
-            # Получаем участников
-            self.progress_signal.emit("📥 Начинаю получение участников...")
-            members = await self.safe_get_chat_members(self.client, chat.id, limit=self.max_members)
+    def start(self, worker):
+        self.parser.start(worker)
 
-            if members is None or not self.is_running:
-                return
+    def stop(self):
+        self.parser.stop()
 
-            # Обрабатываем данные с расширенными полями
-            parsed_data = []
-            for i, member in enumerate(members):
-                if not self.is_running:
-                    break
-
-                try:
-                    user = member.user
-                    
-                    # Собираем все доступные данные в одном запросе
-                    user_data = {
-                        'ID': user.id,
-                        'Username': user.username or '',
-                        'First Name': user.first_name or '',
-                        'Last Name': user.last_name or '',
-                        'Phone': user.phone_number or '' if hasattr(user, 'phone_number') and user.phone_number else '',
-                        'Status': self.get_user_status(user),
-                        'Last Online': self.format_last_online(user),
-                        'Is Bot': 'Да' if user.is_bot else 'Нет',
-                        'Is Verified': 'Да' if user.is_verified else 'Нет',
-                        'Is Scam': 'Да' if user.is_scam else 'Нет',
-                        'Is Premium': 'Да' if user.is_premium else 'Нет'
-                    }
-                    
-                    parsed_data.append(user_data)
-
-                    if (i + 1) % 50 == 0:
-                        self.progress_signal.emit(f"🔄 Обработано: {i + 1}/{len(members)}")
-                        self.progress_value.emit(i + 1)
-
-                except Exception as e:
-                    # В случае ошибки добавляем базовые данные
-                    try:
-                        user = member.user
-                        user_data = {
-                            'ID': user.id,
-                            'Username': user.username or '',
-                            'First Name': user.first_name or '',
-                            'Last Name': user.last_name or '',
-                            'Phone': '',
-                            'Status': 'Неизвестно',
-                            'Last Online': 'Неизвестно',
-                            'Is Bot': 'Неизвестно',
-                            'Is Verified': 'Неизвестно',
-                            'Is Scam': 'Неизвестно',
-                            'Is Premium': 'Неизвестно'
-                        }
-                        parsed_data.append(user_data)
-                    except:
-                        continue
-
-            if self.is_running:
-                self.finished_signal.emit(chat.title, parsed_data)
+    def isRunning(self):
+        return self.parser.isRunning()
 
-        except Exception as e:
-            if self.is_running:
-                self.error_signal.emit(f"❌ Критическая ошибка: {str(e)}")
-        finally:
-            # Восстанавливаем stdin
-            sys.stdin = old_stdin
-            await self.cleanup()
-
-    async def cleanup(self):
-        """Очистка ресурсов"""
-        if self.client:
-            try:
-                if self.client.is_connected:
-                    await self.client.disconnect()
-            except Exception as e:
-                print(f"Ошибка при отключении клиента: {e}")
+    def wait(self, timeout_ms):
+        return self.parser.wait(timeout_ms)
 
-    def stop(self):
-        """Остановка парсинга"""
-        self.is_running = False
+    def cancel(self):
+        self.parser.cancel()
 
-    def run(self):
-        """Запуск потока"""
-        try:
-            asyncio.run(self.parse_group())
-        except Exception as e:
-            if self.is_running:
-                self.error_signal.emit(f"❌ Ошибка выполнения: {str(e)}")
+    def provide_auth_input(self, value):
+        self.parser.provide_auth_input(value)
 
 
 class TelegramParserGUI(QMainWindow):
     """Главное окно приложения"""
+    export_finished = pyqtSignal(str, str)  # Описание файлов, текст ошибки
+    diff_finished = pyqtSignal(str, str)  # Итог сравнения запусков, текст ошибки
 
     def __init__(self):
         super().__init__()
-        self.parser_thread = None
-        self.parsed_data = []
-        self.session_name = "telegram_parser_persistent"  # Постоянная сессия
+        self.parser_task = None
+        self.exports = []  # Запущенные фоновые экспорты
+        self.live_exports = []  # (номер задачи, экспорт, фильтр или None), дописываемые по мере парсинга
+        self.job_models = []  # Результаты в списке групп: группы запуска и открытые снимки
+        self.run_models = []  # Результаты групп текущего запуска по номеру задачи
+        self.finished_jobs = set()
+        self.results_model = None  # Результаты, показанные в таблице (создается с вкладкой результатов)
+        self.session_name = DEFAULT_SESSION_NAME  # Постоянная сессия
+        # Фоновый цикл asyncio с подключенным клиентом, общий для всех запусков
+        self.client_cache = TelegramClientCache()
+        self.worker = AsyncWorker()
+        self.worker.shutdown_hooks.append(self.client_cache.close)
+        self.worker.start()
+        self.chat_cache = ChatCache()  # Найденные группы, чтобы не искать их при каждом запуске
+        self.export_finished.connect(self.on_export_finished)
+        self.diff_finished.connect(self.on_diff_finished)
+        # Лог хода парсинга: сообщения копятся в буфере и выводятся по таймеру
+        self.progress_log = ProgressLog()
+        self.log_file = None
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(STATUS_FLUSH_INTERVAL_MS)
+        self.status_timer.timeout.connect(self.flush_status)
+        # Метрики текущего запуска
+        self.run_metrics = RunMetrics()
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_REFRESH_INTERVAL_MS)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
         self.init_ui()
         self.setup_logging()
 
@@ -367,8 +217,10 @@ class TelegramParserGUI(QMainWindow):
         # Таб парсинга
         self.setup_parser_tab()
 
-        # Таб результатов
-        self.setup_results_tab()
+        # Таб результатов строится при первом открытии или запуске парсинга
+        self.results_tab = QWidget()
+        self.tabs.addTab(self.results_tab, "📋 Результаты")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
     def setup_settings_tab(self):
         """Настройки API"""
@@ -398,6 +250,68 @@ class TelegramParserGUI(QMainWindow):
         self.max_members_input = QLineEdit("1000")
         parse_layout.addRow("Макс. участников:", self.max_members_input)
 
+        self.requests_per_minute_input = QLineEdit(str(DEFAULT_REQUESTS_PER_MINUTE))
+        self.requests_per_minute_input.setToolTip(
+            "Верхняя граница темпа запросов страниц (по 200 участников). "
+            "При FloodWait темп снижается автоматически."
+        )
+        parse_layout.addRow("Запросов в минуту:", self.requests_per_minute_input)
+
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 20)
+        self.concurrency_input.setValue(DEFAULT_JOB_CONCURRENCY)
+        self.concurrency_input.setToolTip("Сколько групп из списка парсится одновременно")
+        parse_layout.addRow("Групп одновременно:", self.concurrency_input)
+
+        self.member_filter_input = QComboBox()
+        for key, (label, _) in MEMBER_FILTERS.items():
+            self.member_filter_input.addItem(label, key)
+        self.member_filter_input.setToolTip(
+            "Отбор выполняет сервер Telegram: для администраторов, ботов и поиска "
+            "нужно намного меньше запросов, чем для всех участников"
+        )
+        self.member_filter_input.currentIndexChanged.connect(self.update_member_query_input)
+        parse_layout.addRow("Участники:", self.member_filter_input)
+
+        self.member_query_input = QLineEdit()
+        self.member_query_input.setPlaceholderText("Имя или username (пусто - без поиска)")
+        parse_layout.addRow("Поиск на сервере:", self.member_query_input)
+
+        self.log_file_checkbox = QCheckBox("Сохранять полный лог в файл (в папку сохранения)")
+        self.log_file_checkbox.setToolTip(f"На вкладке парсинга видны последние {STATUS_LOG_MAX_BLOCKS} строк")
+        parse_layout.addRow("", self.log_file_checkbox)
+
+        self.profile_checkbox = QCheckBox("Профилировать запуск (cProfile + tracemalloc, в папку сохранения)")
+        self.profile_checkbox.setToolTip(
+            "Сохраняет файл .prof и отчет о выделениях памяти - их можно приложить к сообщению об ошибке. "
+            "Парсинг при этом заметно медленнее."
+        )
+        parse_layout.addRow("", self.profile_checkbox)
+
+        self.metrics_file_checkbox = QCheckBox("Сохранять метрики запуска (JSON и Prometheus)")
+        self.metrics_file_checkbox.setToolTip(
+            f"В папку сохранения пишутся metrics_<время>.json и {PROMETHEUS_FILE_NAME}"
+        )
+        parse_layout.addRow("", self.metrics_file_checkbox)
+
+        self.snapshot_checkbox = QCheckBox("Сохранять снимок результатов (.tgsnap, в папку сохранения)")
+        self.snapshot_checkbox.setToolTip(
+            "Снимок открывается кнопкой «Открыть снимок» на вкладке результатов "
+            "мгновенно, даже для сотен тысяч участников"
+        )
+        self.snapshot_checkbox.setChecked(True)
+        parse_layout.addRow("", self.snapshot_checkbox)
+
+        self.store_checkbox = QCheckBox("Сохранять в локальную базу участников")
+        self.store_checkbox.setToolTip(
+            "Повторный парсинг той же группы обновляет только изменившиеся записи "
+            "и отмечает покинувших группу"
+        )
+        parse_layout.addRow("", self.store_checkbox)
+
+        self.store_path_input = QLineEdit(str(Path.cwd() / DEFAULT_STORE_PATH))
+        parse_layout.addRow("Файл базы:", self.store_path_input)
+
         self.save_path_input = QLineEdit(str(Path.home() / "Desktop"))
         parse_layout.addRow("Папка сохранения:", self.save_path_input)
 
@@ -407,6 +321,21 @@ class TelegramParserGUI(QMainWindow):
 
         layout.addWidget(parse_group)
 
+        # Группа настроек экспорта
+        export_group = QGroupBox("💾 Экспорт")
+        export_layout = QFormLayout(export_group)
+
+        self.gzip_export_checkbox = QCheckBox("Сжимать CSV / JSON Lines (gzip)")
+        export_layout.addRow("", self.gzip_export_checkbox)
+
+        self.rows_per_file_input = QSpinBox()
+        self.rows_per_file_input.setRange(0, 100_000_000)
+        self.rows_per_file_input.setSingleStep(100_000)
+        self.rows_per_file_input.setSpecialValueText("без ограничения")
+        export_layout.addRow("Строк в одном файле:", self.rows_per_file_input)
+
+        layout.addWidget(export_group)
+
         # Информация о собираемых данных
         data_info_group = QGroupBox("📋 Собираемые данные")
         data_info_layout = QVBoxLayout(data_info_group)
@@ -477,20 +406,30 @@ class TelegramParserGUI(QMainWindow):
 
         layout = QVBoxLayout(parser_widget)
 
-        # Группа ввода ссылки
-        input_group = QGroupBox("🔗 Ссылка на группу")
+        # Группа ввода ссылок
+        input_group = QGroupBox("🔗 Ссылки на группы")
         input_layout = QVBoxLayout(input_group)
 
-        self.chat_link_input = QLineEdit()
-        self.chat_link_input.setPlaceholderText("https://t.me/groupname, @groupname или просто groupname")
+        self.chat_link_input = QPlainTextEdit()
+        self.chat_link_input.setPlaceholderText(
+            "https://t.me/groupname, @groupname или просто groupname\n"
+            "Несколько групп - по одной ссылке на строке"
+        )
+        self.chat_link_input.setMaximumHeight(100)
+        self.chat_link_input.setStyleSheet("QPlainTextEdit { padding: 8px; background-color: white; }")
         input_layout.addWidget(self.chat_link_input)
 
+        self.load_links_btn = QPushButton("📄 Загрузить список из файла")
+        self.load_links_btn.clicked.connect(self.load_chat_links)
+        input_layout.addWidget(self.load_links_btn)
+
         # Примеры ссылок
         examples_label = QLabel(
             "📝 Примеры ссылок:\n"
             "• https://t.me/python_beginners\n"
             "• @python_beginners\n"
-            "• python_beginners"
+            "• python_beginners\n"
+            "Все группы из списка парсятся через одно подключение"
         )
         examples_label.setStyleSheet("color: #666; font-size: 12px; padding: 5px;")
         input_layout.addWidget(examples_label)
@@ -522,40 +461,123 @@ class TelegramParserGUI(QMainWindow):
         self.progress_bar.setVisible(False)
         progress_layout.addWidget(self.progress_bar)
 
-        self.status_text = QTextEdit()
+        self.status_text = QPlainTextEdit()
         self.status_text.setMaximumHeight(200)
         self.status_text.setReadOnly(True)
+        self.status_text.setMaximumBlockCount(STATUS_LOG_MAX_BLOCKS)
         progress_layout.addWidget(self.status_text)
 
         layout.addWidget(progress_group)
 
+        # Метрики
+        metrics_group = QGroupBox("⏱️ Метрики")
+        metrics_layout = QVBoxLayout(metrics_group)
+
+        self.metrics_text = QPlainTextEdit()
+        self.metrics_text.setMaximumHeight(160)
+        self.metrics_text.setReadOnly(True)
+        metrics_layout.addWidget(self.metrics_text)
+
+        # Состав участников обновляется вместе с метриками
+        stats_group = QGroupBox("👥 Состав участников")
+        stats_layout = QVBoxLayout(stats_group)
+
+        self.stats_text = QPlainTextEdit()
+        self.stats_text.setMaximumHeight(160)
+        self.stats_text.setReadOnly(True)
+        stats_layout.addWidget(self.stats_text)
+
+        panels_layout = QHBoxLayout()
+        panels_layout.addWidget(metrics_group)
+        panels_layout.addWidget(stats_group)
+        layout.addLayout(panels_layout)
+
         layout.addStretch()
 
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.results_tab:
+            self.setup_results_tab()
+
+    @staticmethod
+    def create_results_model():
+        """Пустая модель таблицы результатов (модуль с NumPy загружается при первом вызове)"""
+        from results_model import MembersTableModel
+        return MembersTableModel()
+
     def setup_results_tab(self):
-        """Таб результатов"""
-        results_widget = QWidget()
-        self.tabs.addTab(results_widget, "📋 Результаты")
+        """Таб результатов (строится один раз)"""
+        if self.results_model is not None:
+            return
+        from member_columns import FACETS
 
-        layout = QVBoxLayout(results_widget)
+        self.results_model = self.create_results_model()
+        layout = QVBoxLayout(self.results_tab)
 
         # Кнопки управления
         button_layout = QHBoxLayout()
 
-        self.save_csv_btn = QPushButton("💾 Сохранить CSV")
-        self.save_csv_btn.clicked.connect(self.save_csv)
-        self.save_csv_btn.setEnabled(False)
+        self.job_selector = QComboBox()
+        self.job_selector.setMinimumWidth(250)
+        self.job_selector.currentIndexChanged.connect(self.show_job_results)
+        button_layout.addWidget(QLabel("Группа:"))
+        button_layout.addWidget(self.job_selector)
+
+        self.export_btn = QPushButton("💾 Экспорт (CSV / JSON Lines / SQLite)")
+        self.export_btn.clicked.connect(self.export_results)
+        self.export_btn.setEnabled(False)
+
+        self.diff_btn = QPushButton("🔀 Сравнить с предыдущим запуском")
+        self.diff_btn.setToolTip(
+            "Вступившие, покинувшие и сменившие статус участники по сравнению с файлом "
+            "результатов прошлого запуска. Изменения сохраняются в папку сохранения."
+        )
+        self.diff_btn.clicked.connect(self.compare_with_previous)
+
+        self.open_snapshot_btn = QPushButton("📂 Открыть снимок")
+        self.open_snapshot_btn.setToolTip("Результаты прошлого запуска из файла снимка .tgsnap")
+        self.open_snapshot_btn.clicked.connect(self.open_snapshot)
 
         self.clear_results_btn = QPushButton("🗑️ Очистить")
         self.clear_results_btn.clicked.connect(self.clear_results)
 
-        button_layout.addWidget(self.save_csv_btn)
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.diff_btn)
+        button_layout.addWidget(self.open_snapshot_btn)
         button_layout.addWidget(self.clear_results_btn)
         button_layout.addStretch()
 
         layout.addLayout(button_layout)
 
+        # Фильтры по признакам участников
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Фильтры:"))
+        self.facet_checkboxes = {}
+        for facet, (title, _) in FACETS.items():
+            checkbox = QCheckBox(title)
+            checkbox.toggled.connect(self.apply_filters)
+            filter_layout.addWidget(checkbox)
+            self.facet_checkboxes[facet] = checkbox
+        filter_layout.addStretch()
+        self.filter_info_label = QLabel()
+        filter_layout.addWidget(self.filter_info_label)
+        layout.addLayout(filter_layout)
+
+        # Поиск по username и имени
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Поиск по username, имени или фамилии")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.apply_filters)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        layout.addWidget(self.search_input)
+
         # Таблица результатов
-        self.results_table = QTableWidget()
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.results_table.horizontalHeader().setResizeContentsPrecision(COLUMN_WIDTH_SAMPLE_ROWS)
         layout.addWidget(self.results_table)
 
     def browse_save_path(self):
@@ -564,12 +586,38 @@ class TelegramParserGUI(QMainWindow):
         if folder:
             self.save_path_input.setText(folder)
 
+    def update_member_query_input(self):
+        """Строку поиска сервер учитывает не для всех режимов перечисления"""
+        member_filter = MEMBER_FILTERS[self.member_filter_input.currentData()][1]
+        self.member_query_input.setEnabled(member_filter in QUERY_FILTERS)
+
+    def load_chat_links(self):
+        """Загрузка списка ссылок на группы из текстового файла"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Список групп", "", "Text files (*.txt *.csv);;All files (*)"
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, encoding='utf-8') as f:
+                links = split_chat_links(f.read())
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать файл: {str(e)}")
+            return
+        self.chat_link_input.setPlainText("\n".join(links))
+
     def clear_session(self):
         """Очистка сессии"""
+        if self.parser_task and self.parser_task.isRunning():
+            QMessageBox.warning(self, "Ошибка", "Остановите парсинг перед очисткой сессии.")
+            return
         try:
-            # Удаляем файлы сессии
+            # Отключаем клиент сессии, затем удаляем ее файлы
+            self.worker.submit(self.client_cache.close(self.session_name)).result(10)
             for file in Path.cwd().glob(f"{self.session_name}.*"):
                 file.unlink()
+            # access_hash групп действителен только для этой сессии
+            self.chat_cache.clear(self.session_name)
             QMessageBox.information(self, "Успех",
                                     "Сессия очищена. При следующем парсинге потребуется повторная авторизация.")
         except Exception as e:
@@ -589,7 +637,8 @@ class TelegramParserGUI(QMainWindow):
     def start_parsing(self):
         """Запуск парсинга"""
         # Проверка данных
-        if not all([self.api_id_input.text(), self.api_hash_input.text(), self.chat_link_input.text()]):
+        chat_links = split_chat_links(self.chat_link_input.toPlainText())
+        if not all([self.api_id_input.text(), self.api_hash_input.text(), chat_links]):
             QMessageBox.warning(self, "Ошибка", "Заполните все обязательные поля!")
             return
 
@@ -599,131 +648,429 @@ class TelegramParserGUI(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Введите корректное число участников!")
             return
 
-        # Останавливаем предыдущий поток если он есть
-        if self.parser_thread and self.parser_thread.isRunning():
-            self.parser_thread.stop()
-            self.parser_thread.wait(3000)  # Ждем до 3 секунд
+        try:
+            requests_per_minute = float(self.requests_per_minute_input.text())
+            if requests_per_minute <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Ошибка", "Введите корректное число запросов в минуту!")
+            return
+
+        # Предыдущая задача еще завершается после остановки
+        if self.parser_task and self.parser_task.isRunning():
+            self.update_status("⏳ Дождитесь завершения предыдущего парсинга")
+            return
 
         # UI изменения
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(max_members)
+        self.progress_bar.setMaximum(max_members * len(chat_links))
         self.progress_bar.setValue(0)
         self.status_text.clear()
+        self.open_log_file()
+        self.status_timer.start()
+        self.run_metrics = RunMetrics()
+        self.refresh_metrics()
+        self.metrics_timer.start()
+        self.setup_results_tab()
+        self.clear_results()
+        self.run_models = [self.create_results_model() for _ in chat_links]
+        self.job_models = list(self.run_models)
+        self.clear_results_btn.setEnabled(False)
+        self.job_selector.addItems(chat_links)
         self.tabs.setCurrentIndex(1)  # Переключаем на таб парсинга
 
         # Запуск потока
-        self.parser_thread = TelegramParserThread(
+        self.parser_task = TelegramParserTask(
             self.api_id_input.text(),
             self.api_hash_input.text(),
-            self.chat_link_input.text(),
+            chat_links,
             max_members,
-            self.session_name
+            self.session_name,
+            requests_per_minute,
+            self.store_path_input.text() if self.store_checkbox.isChecked() else None,
+            self.concurrency_input.value(),
+            client_cache=self.client_cache,
+            metrics=self.run_metrics,
+            chat_cache=self.chat_cache,
+            member_filter=MEMBER_FILTERS[self.member_filter_input.currentData()][1],
+            query=self.member_query_input.text(),
+            profiler=self.create_profiler(),
+            progress_log=self.progress_log
         )
 
-        self.parser_thread.progress_signal.connect(self.update_status)
-        self.parser_thread.progress_value.connect(self.progress_bar.setValue)
-        self.parser_thread.finished_signal.connect(self.parsing_finished)
-        self.parser_thread.error_signal.connect(self.parsing_error)
-        self.parser_thread.auth_code_needed.connect(self.handle_auth_code)
-        self.parser_thread.auth_password_needed.connect(self.handle_auth_password)
+        self.parser_task.progress_value.connect(self.progress_bar.setValue)
+        self.parser_task.job_started.connect(self.job_started)
+        self.parser_task.batch_signal.connect(self.append_results)
+        self.parser_task.job_finished.connect(self.job_finished)
+        self.parser_task.job_failed.connect(self.job_failed)
+        self.parser_task.finished_signal.connect(self.parsing_finished)
+        self.parser_task.stopped_signal.connect(self.parsing_stopped)
+        self.parser_task.error_signal.connect(self.parsing_error)
+        self.parser_task.auth_code_needed.connect(self.handle_auth_code)
+        self.parser_task.auth_password_needed.connect(self.handle_auth_password)
 
-        self.parser_thread.start()
+        self.parser_task.start(self.worker)
 
     def stop_parsing(self):
-        """Остановка парсинга"""
-        if self.parser_thread and self.parser_thread.isRunning():
-            self.parser_thread.stop()
+        """Остановка парсинга без ожидания: итог придет через stopped_signal"""
+        if self.parser_task and self.parser_task.isRunning():
+            self.stop_btn.setEnabled(False)
             self.update_status("⏹️ Остановка парсинга...")
+            self.parser_task.stop()
+            return
 
-            # Даем время на корректное завершение
-            if not self.parser_thread.wait(5000):  # Ждем 5 секунд
-                self.parser_thread.terminate()
-                self.parser_thread.wait()
-                self.update_status("⚠️ Парсинг принудительно остановлен")
-            else:
-                self.update_status("✅ Парсинг остановлен")
+        self.finish_live_exports()
+        self.reset_ui()
 
+    def parsing_stopped(self, total):
+        """Парсинг остановлен пользователем, полученные участники сохранены в результатах"""
+        self.update_status(f"✅ Парсинг остановлен, получено {total} участников")
+        # Группы, не завершенные до остановки, сохраняются с тем, что успели получить
+        for job in range(len(self.run_models)):
+            if job not in self.finished_jobs:
+                self.save_job_snapshot(job, self.job_selector.itemText(job))
+        self.finish_live_exports()
         self.reset_ui()
 
     def update_status(self, message):
         """Обновление статуса"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.status_text.append(f"[{timestamp}] {message}")
+        self.progress_log.append(message)
+        if not self.status_timer.isActive():
+            self.flush_status()
+
+    def flush_status(self):
+        """Вывод накопленных сообщений в лог одной пачкой"""
+        lines = self.progress_log.drain()
+        if not lines:
+            return
+
+        text = "\n".join(lines)
+        self.status_text.appendPlainText(text)
+        if self.log_file:
+            try:
+                self.log_file.write(text + "\n")
+                self.log_file.flush()
+            except Exception:
+                self.log_file = None
 
         # Автоскролл
-        cursor = self.status_text.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        self.status_text.setTextCursor(cursor)
+        scroll_bar = self.status_text.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
 
-    def parsing_finished(self, chat_title, data):
-        """Завершение парсинга"""
-        self.parsed_data = data
-        self.update_status(f"✅ Парсинг завершен! Получено {len(data)} участников")
+    def open_log_file(self):
+        """Открытие файла полного лога для нового запуска (если включено)"""
+        self.close_log_file()
+        if not self.log_file_checkbox.isChecked():
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.save_path_input.text(), f"telegram_parser_{timestamp}.log")
+        try:
+            self.log_file = open(path, 'w', encoding='utf-8')
+        except Exception as e:
+            self.update_status(f"⚠️ Не удалось открыть файл лога: {str(e)}")
+
+    def close_log_file(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def run_model(self, job):
+        """Модель результатов задачи текущего запуска (None - результаты запуска очищены).
+
+        Пачки и итоги задач попадают только в модели, созданные при
+        запуске, а не в открытые позже снимки на тех же позициях списка.
+        """
+        return self.run_models[job] if job < len(self.run_models) else None
+
+    def job_started(self, job, chat_link):
+        """Начало парсинга группы из очереди"""
+        if len(self.run_models) > 1:
+            self.update_status(f"▶️ [{job + 1}/{len(self.run_models)}] {chat_link}")
+
+    def append_results(self, job, batch):
+        """Добавление очередной пачки участников группы"""
+        model = self.run_model(job)
+        if model is None:
+            return
+        start = model.total_count()
+        self.fill_results_table(job, batch)
+        for export_job, export, row_filter in self.live_exports:
+            if export_job == job:
+                # Экспорт с фильтром получает только подходящих участников
+                if row_filter is None:
+                    export.submit(batch)
+                else:
+                    export.submit(model.columns.records(model.select(row_filter, start)))
+        if model is self.results_model:
+            self.export_btn.setEnabled(self.results_model.rowCount() > 0)
+            self.update_filter_info()
+
+    def job_finished(self, job, chat_title, total):
+        """Завершение парсинга группы из очереди"""
+        if len(self.run_models) > 1:
+            self.update_status(f"✅ [{job + 1}/{len(self.run_models)}] {chat_title}: {total} участников")
+        self.finish_live_exports(job)
+        if self.run_model(job) is None:
+            return
+        self.finished_jobs.add(job)
+        self.save_job_snapshot(job, chat_title)
+        self.job_selector.setItemText(job, f"{chat_title} ({total})")
 
-        # Заполняем таблицу
-        self.fill_results_table(data)
+    def job_failed(self, job, error_message):
+        """Ошибка парсинга группы из очереди (остальные группы продолжаются)"""
+        self.update_status(error_message)
+        self.finish_live_exports(job)
+        if self.run_model(job) is not None:
+            self.finished_jobs.add(job)
+            self.job_selector.setItemText(job, f"⚠️ {self.job_selector.itemText(job)}")
+        if len(self.run_models) == 1:
+            QMessageBox.critical(self, "Ошибка парсинга", error_message)
+
+    def show_job_results(self, job):
+        """Показ результатов выбранной группы"""
+        if 0 <= job < len(self.job_models):
+            self.results_model = self.job_models[job]
+        else:
+            self.results_model = self.create_results_model()
+        row_filter = self.current_filter()
+        if self.results_model.filter != row_filter:
+            self.results_model.set_filter(row_filter)
+        self.results_table.setModel(self.results_model)
+        self.results_table.resizeColumnsToContents()
+        self.export_btn.setEnabled(self.results_model.rowCount() > 0)
+        self.update_filter_info()
+
+    def current_filter(self):
+        """Фильтр результатов по отмеченным признакам и строке поиска"""
+        facets = tuple(facet for facet, checkbox in self.facet_checkboxes.items() if checkbox.isChecked())
+        return facets, self.search_input.text().strip()
+
+    def apply_filters(self):
+        """Применение отмеченных фильтров и поиска к показанным результатам"""
+        started = time.perf_counter()
+        self.results_model.set_filter(self.current_filter())
+        self.export_btn.setEnabled(self.results_model.rowCount() > 0)
+        self.update_filter_info(time.perf_counter() - started)
+
+    def update_filter_info(self, elapsed=None):
+        """Число показанных строк (и время фильтрации)"""
+        total = self.results_model.total_count()
+        shown = self.results_model.rowCount()
+        filtered = self.results_model.is_filtered()
+        text = f"Показано {shown} из {total}" if filtered else f"Всего: {total}"
+        if elapsed is not None and filtered:
+            text += f" ({elapsed * 1000:.1f} мс)"
+        self.filter_info_label.setText(text)
+
+    def parsing_finished(self, total):
+        """Завершение парсинга"""
+        self.update_status(f"✅ Парсинг завершен! Получено {total} участников")
+        self.update_status(f"📊 Состав: {self.run_metrics.members.describe()}")
+        self.finish_live_exports()
 
         # Переключаемся на результаты
         self.tabs.setCurrentIndex(2)
 
         self.reset_ui()
-        self.save_csv_btn.setEnabled(True)
 
     def parsing_error(self, error_message):
         """Обработка ошибок"""
         self.update_status(error_message)
+        self.finish_live_exports()
         QMessageBox.critical(self, "Ошибка парсинга", error_message)
         self.reset_ui()
 
-    def fill_results_table(self, data):
-        """Заполнение таблицы результатов"""
-        if not data:
+    def fill_results_table(self, job, data):
+        """Дозаполнение таблицы результатов группы пачкой строк"""
+        model = self.run_model(job)
+        if not data or model is None:
             return
 
-        headers = list(data[0].keys())
-        self.results_table.setColumnCount(len(headers))
-        self.results_table.setRowCount(len(data))
-        self.results_table.setHorizontalHeaderLabels(headers)
+        first_batch = model.rowCount() == 0
+        with self.run_metrics.timer("table_fill"):
+            model.append_records(data)
 
-        for row, item in enumerate(data):
-            for col, header in enumerate(headers):
-                self.results_table.setItem(row, col, QTableWidgetItem(str(item[header])))
+            # Ширину колонок подбираем один раз по выборке первых строк
+            if first_batch and model is self.results_model:
+                self.results_table.resizeColumnsToContents()
 
-        self.results_table.resizeColumnsToContents()
+    def export_results(self):
+        """Экспорт результатов в выбранный формат в фоновом потоке.
 
-    def save_csv(self):
-        """Сохранение в CSV"""
-        if not self.parsed_data:
+        Если парсинг еще идет, экспорт остается подключенным и дописывает
+        новые пачки участников до завершения парсинга.
+        """
+        if not self.results_model.rowCount():
             return
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         default_name = f"telegram_members_extended_{timestamp}.csv"
+        filters = {
+            f"{name} (*{exporter_class.extension})": exporter_class
+            for name, exporter_class in EXPORTERS.items()
+        }
 
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "Сохранить CSV",
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "Экспорт результатов",
             os.path.join(self.save_path_input.text(), default_name),
-            "CSV files (*.csv)"
+            ";;".join(filters)
         )
 
-        if filename:
-            try:
-                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                    if self.parsed_data:
-                        writer = csv.DictWriter(csvfile, fieldnames=self.parsed_data[0].keys())
-                        writer.writeheader()
-                        writer.writerows(self.parsed_data)
+        if not filename:
+            return
+
+        exporter_class = filters.get(selected_filter) or exporter_for_path(filename)
+        # Диалог мог оставить расширение по умолчанию при выборе другого формата
+        if exporter_for_path(filename) is not exporter_class:
+            filename = os.path.splitext(filename)[0] + exporter_class.extension
+
+        exporter = exporter_class(
+            filename,
+            gzip_output=self.gzip_export_checkbox.isChecked(),
+            rows_per_file=self.rows_per_file_input.value()
+        )
+        export = ExportWorker(exporter, on_done=self.export_finished.emit, metrics=self.run_metrics)
+        export.start()
+        self.exports = [e for e in self.exports if e.is_alive()] + [export]
+        export.submit_columns(self.results_model.columns, self.results_model.rows)
+
+        job = self.job_selector.currentIndex()
+        if self.parser_task and self.parser_task.isRunning() and job not in self.finished_jobs:
+            row_filter = self.results_model.filter if self.results_model.is_filtered() else None
+            self.live_exports.append((job, export, row_filter))
+            self.update_status(f"💾 Экспорт подключен, новые участники дописываются в {exporter.path}")
+        else:
+            export.finish()
+
+    def compare_with_previous(self):
+        """Сравнение результатов с файлом прошлого запуска в фоновом потоке.
+
+        Новый запуск - результаты выбранной группы, а если их нет,
+        второй файл, выбранный пользователем.
+        """
+        from run_diff import diff_runs, load_records, write_delta
+
+        file_filter = "Результаты (*.csv *.csv.gz *.jsonl *.jsonl.gz *.db *.tgsnap);;All files (*)"
+        old_path, _ = QFileDialog.getOpenFileName(
+            self, "Результаты предыдущего запуска", self.save_path_input.text(), file_filter
+        )
+        if not old_path:
+            return
 
-                QMessageBox.information(self, "Успех", f"Файл сохранен: {filename}")
+        new_path = None
+        # Записи новых результатов собираются из колонок уже в фоновом потоке
+        new_columns = self.results_model.columns if len(self.results_model.columns) else None
+        if new_columns is None:
+            new_path, _ = QFileDialog.getOpenFileName(
+                self, "Результаты нового запуска", os.path.dirname(old_path), file_filter
+            )
+            if not new_path:
+                return
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        delta_path = os.path.join(self.save_path_input.text(), f"telegram_members_delta_{timestamp}.csv")
+        if self.gzip_export_checkbox.isChecked():
+            delta_path += ".gz"
+
+        def run():
+            try:
+                new_records = new_columns.records() if new_path is None else load_records(new_path)
+                diff = diff_runs(load_records(old_path), new_records)
+                write_delta(delta_path, diff)
             except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {str(e)}")
+                self.diff_finished.emit("", str(e))
+                return
+            self.diff_finished.emit(f"{diff.describe()}\nИзменения сохранены: {delta_path}", "")
+
+        self.diff_btn.setEnabled(False)
+        self.update_status(f"🔀 Сравнение с {os.path.basename(old_path)}...")
+        threading.Thread(target=run, daemon=True).start()
+
+    def save_job_snapshot(self, job, title):
+        """Снимок результатов группы в папку сохранения (если включено)"""
+        model = self.run_model(job)
+        if model is None or not self.snapshot_checkbox.isChecked() or not model.total_count():
+            return
+        from snapshot import SNAPSHOT_EXTENSION, save_snapshot
+
+        chat_link = self.job_selector.itemText(job)
+        timestamp = datetime.fromtimestamp(self.run_metrics.started).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(
+            self.save_path_input.text(),
+            f"telegram_members_{timestamp}_{normalize_chat_link(chat_link)}{SNAPSHOT_EXTENSION}"
+        )
+        try:
+            with self.run_metrics.timer("snapshot_save"):
+                save_snapshot(path, model.columns, model.search_index, title=title, chat=chat_link)
+            self.update_status(f"📦 Снимок результатов сохранен: {path}")
+        except Exception as e:
+            self.update_status(f"⚠️ Не удалось сохранить снимок: {str(e)}")
+
+    def open_snapshot(self):
+        """Открытие снимка результатов как еще одной группы в списке.
+
+        Файл отображается в память: таблица читает только видимые строки,
+        поэтому открытие не зависит от числа участников.
+        """
+        from snapshot import SNAPSHOT_EXTENSION, load_snapshot
+
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Снимок результатов", self.save_path_input.text(),
+            f"Снимки результатов (*{SNAPSHOT_EXTENSION});;All files (*)"
+        )
+        if not path:
+            return
+        try:
+            snapshot = load_snapshot(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть снимок: {str(e)}")
+            return
+
+        model = self.create_results_model()
+        model.set_columns(snapshot.columns, snapshot.search_index)
+        self.job_models.append(model)
+        self.finished_jobs.add(len(self.job_models) - 1)
+        self.job_selector.addItem(f"📂 {snapshot.describe()}")
+        self.job_selector.setCurrentIndex(len(self.job_models) - 1)
+
+    def on_diff_finished(self, summary, error):
+        """Завершение сравнения запусков"""
+        self.diff_btn.setEnabled(True)
+        if error:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сравнить запуски: {error}")
+            return
+        self.update_status(f"🔀 {summary}")
+        QMessageBox.information(self, "Сравнение запусков", summary)
+
+    def finish_live_exports(self, job=None):
+        """Завершение экспортов, подключенных во время парсинга (всех или одной группы)"""
+        remaining = []
+        for export_job, export, row_filter in self.live_exports:
+            if job is None or export_job == job:
+                export.finish()
+            else:
+                remaining.append((export_job, export, row_filter))
+        self.live_exports = remaining
+
+    def on_export_finished(self, description, error):
+        """Завершение фонового экспорта"""
+        self.refresh_metrics()
+        if error:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {error}")
+        else:
+            QMessageBox.information(self, "Успех", f"Файл сохранен: {description}")
 
     def clear_results(self):
         """Очистка результатов"""
-        self.parsed_data = []
-        self.results_table.setRowCount(0)
-        self.save_csv_btn.setEnabled(False)
+        for model in self.job_models:
+            model.clear()
+        self.job_models = []
+        self.run_models = []
+        self.finished_jobs = set()
+        self.job_selector.clear()
+        self.show_job_results(-1)
 
     def handle_auth_code(self, message):
         """Обработка запроса кода авторизации"""
@@ -734,10 +1081,7 @@ class TelegramParserGUI(QMainWindow):
             QLineEdit.EchoMode.Normal
         )
 
-        if ok and code:
-            self.parser_thread.auth_code = code.strip()
-        else:
-            self.parser_thread.auth_code = ""
+        self.parser_task.provide_auth_input(code.strip() if ok and code else "")
 
     def handle_auth_password(self):
         """Обработка запроса пароля 2FA"""
@@ -748,76 +1092,65 @@ class TelegramParserGUI(QMainWindow):
             QLineEdit.EchoMode.Password
         )
 
-        if ok and password:
-            self.parser_thread.auth_password = password
-        else:
-            self.parser_thread.auth_password = ""
+        self.parser_task.provide_auth_input(password if ok and password else "")
+
+    def refresh_metrics(self):
+        """Обновление панелей метрик и состава участников"""
+        self.metrics_text.setPlainText("\n".join(self.run_metrics.format_lines()))
+        self.stats_text.setPlainText("\n".join(self.run_metrics.members.format_lines()))
+
+    def create_profiler(self):
+        """Профилировщик запуска, если включен в настройках"""
+        if not self.profile_checkbox.isChecked():
+            return None
+        timestamp = datetime.fromtimestamp(self.run_metrics.started).strftime("%Y%m%d_%H%M%S")
+        return RunProfiler(os.path.join(self.save_path_input.text(), f"telegram_parser_profile_{timestamp}"))
+
+    def save_metrics(self):
+        """Сохранение метрик запуска в папку сохранения (если включено)"""
+        if not self.metrics_file_checkbox.isChecked():
+            return
+        folder = self.save_path_input.text()
+        timestamp = datetime.fromtimestamp(self.run_metrics.started).strftime("%Y%m%d_%H%M%S")
+        try:
+            self.run_metrics.write_json(os.path.join(folder, f"metrics_{timestamp}.json"))
+            self.run_metrics.write_prometheus(os.path.join(folder, PROMETHEUS_FILE_NAME))
+            self.update_status(f"⏱️ Метрики сохранены в {folder}")
+        except Exception as e:
+            self.update_status(f"⚠️ Не удалось сохранить метрики: {str(e)}")
 
     def reset_ui(self):
         """Сброс UI после парсинга"""
+        self.metrics_timer.stop()
+        self.refresh_metrics()
+        self.status_timer.stop()
+        self.flush_status()
+        self.save_metrics()
+        self.close_log_file()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        self.clear_results_btn.setEnabled(True)
         self.progress_bar.setVisible(False)
         self.progress_bar.setValue(0)
 
     def closeEvent(self, event):
         """Обработка закрытия приложения"""
-        if self.parser_thread and self.parser_thread.isRunning():
-            self.parser_thread.stop()
-            self.parser_thread.wait(3000)
+        if self.parser_task and self.parser_task.isRunning():
+            self.parser_task.stop()
+            if not self.parser_task.wait(3000):
+                self.parser_task.cancel()
+        # Отключаем клиент и останавливаем фоновый цикл
+        self.worker.stop()
+        # Дожидаемся записи уже полученных данных
+        self.finish_live_exports()
+        for export in self.exports:
+            export.join(5)
         event.accept()
 
 
 def main():
     app = QApplication(sys.argv)
-
-    # Стиль приложения
-    app.setStyleSheet("""
-        QMainWindow {
-            background-color: #f5f5f5;
-        }
-        QGroupBox {
-            font-weight: bold;
-            border: 2px solid #ccc;
-            border-radius: 5px;
-            margin: 10px 0px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 5px 0 5px;
-        }
-        QPushButton {
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            font-weight: bold;
-        }
-        QPushButton:hover {
-            opacity: 0.8;
-        }
-        QLineEdit {
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-        }
-        QTextEdit {
-            border: 1px solid #ddd;
-            border-radius: 4px;
-        }
-        QTableWidget {
-            gridline-color: #ddd;
-            background-color: white;
-        }
-        QTableWidget::item {
-            padding: 5px;
-        }
-        QTableWidget::item:selected {
-            background-color: #3498db;
-            color: white;
-        }
-    """)
+    app.setStyleSheet(APP_STYLE_SHEET)
 
     window = TelegramParserGUI()
     window.show()
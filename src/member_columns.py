@@ -0,0 +1,184 @@
+"""Колоночное хранение результатов парсинга и фильтры по признакам (facets).
+
+Числовые поля участников лежат в массивах NumPy, строки - индексами в
+общем пуле строк (одинаковые имена хранятся один раз). Фильтры
+считаются векторно как булевы маски и на сотнях тысяч строк
+выполняются за миллисекунды.
+"""
+import time
+
+import numpy as np
+
+from records import FLAG_BOT, FLAG_PREMIUM, FLAG_SCAM, FLAG_VERIFIED, MemberRecord, MemberStatus
+
+
+INITIAL_CAPACITY = 1024
+DAY = 24 * 60 * 60
+
+# Код статуса -> MemberStatus
+_STATUSES = {int(status): status for status in MemberStatus}
+
+
+class StringPool:
+    """Пул строк: строка -> номер, пустая строка всегда имеет номер 0"""
+
+    def __init__(self):
+        self.strings = [""]
+        self._index = {"": 0}
+
+    def intern_many(self, values):
+        """Номера для списка строк (новые строки добавляются в пул)"""
+        index = self._index
+        strings = self.strings
+        result = []
+        for value in values:
+            number = index.get(value)
+            if number is None:
+                number = index[value] = len(strings)
+                strings.append(value)
+            result.append(number)
+        return result
+
+    def get_many(self, indices):
+        """Строки по списку номеров"""
+        strings = self.strings
+        return [strings[index] for index in indices]
+
+    def __getitem__(self, index):
+        return self.strings[index]
+
+
+class MemberColumns:
+    """Результаты парсинга по колонкам.
+
+    Строки добавляются пачками записей records.MemberRecord, обратно
+    записи восстанавливаются по номеру строки.
+    """
+    STRING_FIELDS = ("username", "first_name", "last_name", "phone")
+
+    def __init__(self):
+        self.size = 0
+        self.pool = StringPool()
+        self.ids = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.flags = np.empty(INITIAL_CAPACITY, dtype=np.uint8)
+        self.status = np.empty(INITIAL_CAPACITY, dtype=np.uint8)
+        self.last_online = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.strings = {field: np.empty(INITIAL_CAPACITY, dtype=np.int32) for field in self.STRING_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, pool, ids, flags, status, last_online, **strings):
+        """Колонки поверх готовых массивов (например, снимка, отображенного в память).
+
+        Массивы не копируются; такие колонки только для чтения.
+        """
+        columns = cls.__new__(cls)
+        columns.size = len(ids)
+        columns.pool = pool
+        columns.ids = ids
+        columns.flags = flags
+        columns.status = status
+        columns.last_online = last_online
+        columns.strings = {field: strings[field] for field in cls.STRING_FIELDS}
+        return columns
+
+    def __len__(self):
+        return self.size
+
+    def _arrays(self):
+        return [self.ids, self.flags, self.status, self.last_online, *self.strings.values()]
+
+    def _reserve(self, size):
+        capacity = len(self.ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity = max(capacity * 2, INITIAL_CAPACITY)
+        self.ids, self.flags, self.status, self.last_online, *strings = (
+            np.resize(array, capacity) for array in self._arrays()
+        )
+        self.strings = dict(zip(self.STRING_FIELDS, strings))
+
+    def append(self, records):
+        """Добавление пачки записей в конец"""
+        count = len(records)
+        if not count:
+            return
+        start, end = self.size, self.size + count
+        self._reserve(end)
+
+        # Порядок полей MemberRecord: id, строковые поля, flags, status, last_online
+        ids, *strings, flags, status, last_online = zip(*records)
+        self.ids[start:end] = ids
+        self.flags[start:end] = flags
+        self.status[start:end] = status
+        self.last_online[start:end] = last_online
+        for field, values in zip(self.STRING_FIELDS, strings):
+            self.strings[field][start:end] = self.pool.intern_many(values)
+        self.size = end
+
+    def record(self, row):
+        """Запись участника по номеру строки"""
+        pool = self.pool
+        strings = self.strings
+        return MemberRecord(
+            int(self.ids[row]),
+            pool[strings["username"][row]],
+            pool[strings["first_name"][row]],
+            pool[strings["last_name"][row]],
+            pool[strings["phone"][row]],
+            int(self.flags[row]),
+            MemberStatus(int(self.status[row])),
+            int(self.last_online[row])
+        )
+
+    def records(self, rows=None):
+        """Записи по номерам строк (все - если rows не задан)"""
+        rows = slice(0, self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        # Колонки читаются целиком по строкам rows, записи собираются без обращений к NumPy по одной
+        strings = [self.pool.get_many(self.strings[field][rows].tolist()) for field in self.STRING_FIELDS]
+        statuses = [_STATUSES[code] for code in self.status[rows].tolist()]
+        return list(map(MemberRecord, self.ids[rows].tolist(), *strings, self.flags[rows].tolist(), statuses,
+                        self.last_online[rows].tolist()))
+
+    def select(self, facets, start=0, stop=None):
+        """Номера строк из [start, stop), подходящих под все признаки facets"""
+        stop = self.size if stop is None else stop
+        mask = np.ones(stop - start, dtype=bool)
+        view = ColumnsView(self, start, stop)
+        for facet in facets:
+            mask &= FACETS[facet][1](view)
+        return np.flatnonzero(mask) + start
+
+
+class ColumnsView:
+    """Срез колонок для вычисления масок"""
+
+    def __init__(self, columns, start, stop):
+        self.ids = columns.ids[start:stop]
+        self.flags = columns.flags[start:stop]
+        self.status = columns.status[start:stop]
+        self.last_online = columns.last_online[start:stop]
+        self.strings = {field: array[start:stop] for field, array in columns.strings.items()}
+
+
+def _seen_within(view, days, statuses):
+    """Были в сети не раньше чем days дней назад"""
+    recent = np.isin(view.status, [int(status) for status in statuses])
+    offline = (view.status == MemberStatus.OFFLINE) & (view.last_online >= time.time() - days * DAY)
+    return recent | offline
+
+
+# Признак -> (название для фильтра, функция маски по ColumnsView)
+FACETS = {
+    "bot": ("🤖 Боты", lambda v: (v.flags & FLAG_BOT) != 0),
+    "not_bot": ("👤 Без ботов", lambda v: (v.flags & FLAG_BOT) == 0),
+    "premium": ("⭐ Premium", lambda v: (v.flags & FLAG_PREMIUM) != 0),
+    "verified": ("✔️ Верифицированные", lambda v: (v.flags & FLAG_VERIFIED) != 0),
+    "scam": ("⚠️ Scam", lambda v: (v.flags & FLAG_SCAM) != 0),
+    "username": ("@ С username", lambda v: v.strings["username"] != 0),
+    "phone": ("📞 С телефоном", lambda v: v.strings["phone"] != 0),
+    "week": ("🟢 В сети за неделю", lambda v: _seen_within(
+        v, 7, (MemberStatus.ONLINE, MemberStatus.RECENTLY, MemberStatus.LAST_WEEK))),
+    "month": ("🟡 В сети за месяц", lambda v: _seen_within(
+        v, 30, (MemberStatus.ONLINE, MemberStatus.RECENTLY, MemberStatus.LAST_WEEK, MemberStatus.LAST_MONTH))),
+}
@@ -0,0 +1,103 @@
+"""Состав участников: счетчики флагов и распределение статусов.
+
+Обновляется по мере получения пачек (O(1) на участника): в гистограммы
+по маске флагов и по коду статуса добавляется по единице. Доли ботов,
+premium и т.д. считаются из 32 ячеек гистограммы флагов только при
+показе, поэтому результаты для этого не нужно перебирать заново.
+"""
+import threading
+
+from records import FLAG_BOT, FLAG_PREMIUM, FLAG_SCAM, FLAG_UNKNOWN, FLAG_VERIFIED, MemberStatus, STATUS_LABELS
+
+
+# Флаг -> (ключ для JSON / Prometheus, название для панели)
+FLAG_STATS = {
+    FLAG_BOT: ("bots", "Боты"),
+    FLAG_PREMIUM: ("premium", "Premium"),
+    FLAG_VERIFIED: ("verified", "Верифицированные"),
+    FLAG_SCAM: ("scam", "Scam"),
+    FLAG_UNKNOWN: ("unknown_flags", "Флаги неизвестны"),
+}
+FLAG_MASKS = FLAG_BOT | FLAG_VERIFIED | FLAG_SCAM | FLAG_PREMIUM | FLAG_UNKNOWN
+
+
+class MemberStats:
+    """Агрегаты по участникам, полученным в запуске (или в одной группе)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.with_username = 0
+        self.with_phone = 0
+        self.flag_counts = [0] * (FLAG_MASKS + 1)  # маска флагов -> участников
+        self.status_counts = [0] * len(MemberStatus)  # код статуса -> участников
+
+    def add(self, records):
+        """Учет пачки записей records.MemberRecord"""
+        with self._lock:
+            flag_counts = self.flag_counts
+            status_counts = self.status_counts
+            for record in records:
+                flag_counts[record.flags] += 1
+                status_counts[record.status] += 1
+                if record.username:
+                    self.with_username += 1
+                if record.phone:
+                    self.with_phone += 1
+            self.total += len(records)
+
+    def count_flag(self, flag):
+        return sum(count for mask, count in enumerate(self.flag_counts) if mask & flag)
+
+    def snapshot(self):
+        """Текущие значения в виде словаря (для JSON)"""
+        with self._lock:
+            return {
+                "total": self.total,
+                "with_username": self.with_username,
+                "with_phone": self.with_phone,
+                **{key: self.count_flag(flag) for flag, (key, _) in FLAG_STATS.items()},
+                "status": {status.name.lower(): self.status_counts[status] for status in MemberStatus},
+            }
+
+    @staticmethod
+    def share(count, total):
+        return f"{count} ({count / total:.1%})" if total else "0"
+
+    def format_lines(self):
+        """Строки для панели состава участников"""
+        snapshot = self.snapshot()
+        total = snapshot["total"]
+        lines = [f"Участников: {total}"]
+        for key, label in FLAG_STATS.values():
+            lines.append(f"{label}: {self.share(snapshot[key], total)}")
+        lines.append(f"С username: {self.share(snapshot['with_username'], total)}")
+        lines.append(f"С телефоном: {self.share(snapshot['with_phone'], total)}")
+        lines.append("Статусы:")
+        for status in MemberStatus:
+            count = snapshot["status"][status.name.lower()]
+            if count:
+                lines.append(f"  {STATUS_LABELS[status]}: {self.share(count, total)}")
+        return lines
+
+    def describe(self):
+        """Краткая сводка одной строкой (для лога)"""
+        snapshot = self.snapshot()
+        total = snapshot["total"]
+        return ", ".join(
+            f"{label.lower()} {self.share(snapshot[key], total)}"
+            for flag, (key, label) in FLAG_STATS.items() if flag != FLAG_UNKNOWN
+        )
+
+    def prometheus_lines(self, prefix):
+        """Метрики состава в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        name = f"{prefix}_members_by_kind"
+        lines = [f"# HELP {name} Участники по признакам", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{kind="{key}"}} {snapshot[key]}'
+                  for key in ("total", "with_username", "with_phone",
+                              *(key for key, _ in FLAG_STATS.values()))]
+        name = f"{prefix}_members_by_status"
+        lines += [f"# HELP {name} Участники по статусу", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{status="{status}"}} {count}' for status, count in snapshot["status"].items()]
+        return lines
@@ -0,0 +1,123 @@
+"""Локальное хранилище участников чатов с инкрементальной синхронизацией"""
+import sqlite3
+import time
+
+
+DEFAULT_STORE_PATH = "members_store.db"
+
+# Колонка хранилища (одноименное поле records.MemberRecord) -> тип
+STORE_FIELDS = {
+    'username': 'TEXT',
+    'first_name': 'TEXT',
+    'last_name': 'TEXT',
+    'phone': 'TEXT',
+    'flags': 'INTEGER',
+    'status': 'INTEGER',
+    'last_online': 'INTEGER',
+}
+
+
+class MemberStore:
+    """Хранилище участников в SQLite с ключом (chat_id, user_id).
+
+    Повторная синхронизация чата перезаписывает только строки, у которых
+    изменились поля. Участники, не встреченные при полном перечислении,
+    помечаются ушедшими (departed_at). Несколько чатов можно
+    синхронизировать одновременно. Использовать из одного потока.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{column} {sql_type}" for column, sql_type in STORE_FIELDS.items())
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS members (
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                {columns},
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                departed_at REAL,
+                PRIMARY KEY (chat_id, user_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS chats (
+                chat_id INTEGER PRIMARY KEY,
+                title TEXT,
+                last_sync REAL,
+                members_count INTEGER
+            );
+            CREATE TEMP TABLE seen_members (
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (chat_id, user_id)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+        changed = " OR ".join(f"members.{column} IS NOT excluded.{column}" for column in STORE_FIELDS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in STORE_FIELDS)
+        self._upsert_sql = f"""
+            INSERT INTO members (chat_id, user_id, {", ".join(STORE_FIELDS)}, first_seen, updated_at)
+            VALUES (?, ?, {", ".join("?" for _ in STORE_FIELDS)}, ?, ?)
+            ON CONFLICT (chat_id, user_id) DO UPDATE SET
+                {updates}, updated_at = excluded.updated_at, departed_at = NULL
+            WHERE {changed} OR members.departed_at IS NOT NULL
+        """
+
+    def begin_sync(self, chat_id, title):
+        """Начало синхронизации чата"""
+        self.conn.execute("DELETE FROM temp.seen_members WHERE chat_id = ?", (chat_id,))
+        self.conn.execute(
+            "INSERT INTO chats (chat_id, title) VALUES (?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET title = excluded.title",
+            (chat_id, title)
+        )
+        self.conn.commit()
+
+    def upsert_rows(self, chat_id, records):
+        """Запись пачки записей участников, возвращает число измененных"""
+        now = time.time()
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO temp.seen_members (chat_id, user_id) VALUES (?, ?)",
+                ((chat_id, record.id) for record in records)
+            )
+            seen_changes = self.conn.total_changes - before
+            self.conn.executemany(
+                self._upsert_sql,
+                ((chat_id, record.id, *(getattr(record, field) for field in STORE_FIELDS), now, now)
+                 for record in records)
+            )
+        return self.conn.total_changes - before - seen_changes
+
+    def finish_sync(self, chat_id, complete):
+        """Завершение синхронизации.
+
+        При полном перечислении (complete) участники, которых не было
+        в этой синхронизации, помечаются ушедшими. Возвращает их число.
+        """
+        departed = 0
+        now = time.time()
+        with self.conn:
+            if complete:
+                departed = self.conn.execute(
+                    "UPDATE members SET departed_at = ?, updated_at = ? "
+                    "WHERE chat_id = ? AND departed_at IS NULL "
+                    "AND user_id NOT IN (SELECT user_id FROM temp.seen_members WHERE chat_id = ?)",
+                    (now, now, chat_id, chat_id)
+                ).rowcount
+            members_count = self.conn.execute(
+                "SELECT COUNT(*) FROM members WHERE chat_id = ? AND departed_at IS NULL", (chat_id,)
+            ).fetchone()[0]
+            self.conn.execute(
+                "UPDATE chats SET last_sync = ?, members_count = ? WHERE chat_id = ?",
+                (now, members_count, chat_id)
+            )
+            self.conn.execute("DELETE FROM temp.seen_members WHERE chat_id = ?", (chat_id,))
+        return departed
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,136 @@
+"""Метрики запуска парсинга: длительности этапов и счетчики.
+
+Заполняются из любого потока (цикл воркера, GUI, потоки экспорта).
+Итог запуска можно сохранить в JSON и в текстовый файл Prometheus
+(для textfile collector node_exporter). В итог входит и состав
+полученных участников (member_stats.MemberStats).
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from atomic_file import atomic_write
+from member_stats import MemberStats
+
+
+# Этап -> название для панели метрик
+STAGE_LABELS = {
+    "connect": "Подключение",
+    "auth": "Авторизация",
+    "get_chat": "Поиск группы",
+    "pacing": "Ожидание темпа",
+    "fetch_page": "Запросы страниц",
+    "flood_wait": "Ожидание FloodWait",
+    "reconnect": "Переподключение",
+    "transform": "Обработка участников",
+    "store_upsert": "Локальная база",
+    "table_fill": "Заполнение таблицы",
+    "export_write": "Запись экспорта",
+    "snapshot_save": "Запись снимка",
+}
+
+# Счетчик -> название для панели метрик
+COUNTER_LABELS = {
+    "pages": "Страниц",
+    "members": "Участников",
+    "flood_waits": "Число FloodWait",
+    "flood_wait_seconds": "Секунд FloodWait",
+    "reconnects": "Переподключений",
+    "export_rows": "Строк экспорта",
+    "export_bytes": "Байт экспорта",
+}
+
+PROMETHEUS_PREFIX = "tg_parser"
+
+
+class RunMetrics:
+    """Длительности этапов (сумма секунд и число замеров) и счетчики одного запуска"""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}  # этап -> [секунды, число замеров]
+        self._counters = {}
+        self.members = MemberStats()  # Состав участников всех групп запуска
+
+    @contextmanager
+    def timer(self, stage):
+        """Замер длительности блока как этапа stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - started)
+
+    def add_time(self, stage, seconds, count=1):
+        with self._lock:
+            totals = self._stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += count
+
+    def inc(self, counter, value=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def snapshot(self):
+        """Текущие значения в виде словаря (для JSON)"""
+        with self._lock:
+            stages = {stage: {"seconds": round(seconds, 6), "count": count}
+                      for stage, (seconds, count) in self._stages.items()}
+            counters = dict(self._counters)
+        return {
+            "started": self.started,
+            "elapsed": round(time.time() - self.started, 3),
+            "stages": stages,
+            "counters": counters,
+            "members": self.members.snapshot(),
+        }
+
+    def format_lines(self):
+        """Строки для панели метрик"""
+        snapshot = self.snapshot()
+        lines = [f"Время запуска: {snapshot['elapsed']:.1f} с"]
+        for stage, values in snapshot["stages"].items():
+            lines.append(f"{STAGE_LABELS.get(stage, stage)}: {values['seconds']:.2f} с ({values['count']})")
+        for counter, value in snapshot["counters"].items():
+            if isinstance(value, float):
+                value = f"{value:.1f}"
+            lines.append(f"{COUNTER_LABELS.get(counter, counter)}: {value}")
+        return lines
+
+    def to_prometheus(self):
+        """Метрики в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_seconds_total Время этапов парсинга",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [f'{PROMETHEUS_PREFIX}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]}'
+                  for stage, values in snapshot["stages"].items()]
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_calls_total Число замеров этапов",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_calls_total counter",
+        ]
+        lines += [f'{PROMETHEUS_PREFIX}_stage_calls_total{{stage="{stage}"}} {values["count"]}'
+                  for stage, values in snapshot["stages"].items()]
+        for counter, value in snapshot["counters"].items():
+            name = f"{PROMETHEUS_PREFIX}_{counter}_total"
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+        lines += [
+            f"# TYPE {PROMETHEUS_PREFIX}_run_started_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_started_timestamp_seconds {snapshot['started']}",
+            f"# TYPE {PROMETHEUS_PREFIX}_run_elapsed_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_elapsed_seconds {snapshot['elapsed']}",
+        ]
+        lines += self.members.prometheus_lines(PROMETHEUS_PREFIX)
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        with atomic_write(path, encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def write_prometheus(self, path):
+        # Файл подменяется целиком, чтобы коллектор не прочитал его наполовину
+        with atomic_write(path, encoding='utf-8') as f:
+            f.write(self.to_prometheus())
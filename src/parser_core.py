@@ -0,0 +1,789 @@
+"""Ядро парсинга участников Telegram групп (без зависимости от Qt).
+
+pyrogram импортируется только при запуске парсинга (модуль telegram_api),
+поэтому импорт ядра не замедляет старт GUI и CLI.
+"""
+import sys
+import asyncio
+import concurrent.futures
+import time
+from io import StringIO
+
+from chat_cache import ResolvedChat
+from member_stats import MemberStats
+from member_store import MemberStore
+from metrics import RunMetrics
+from records import record_from_user
+
+
+# Сессия Telegram по умолчанию (файл <имя>.session в текущей папке)
+DEFAULT_SESSION_NAME = "telegram_parser_persistent"
+# Размер пачки участников, передаваемой подписчикам (GUI, экспорт, база)
+MEMBERS_BATCH_SIZE = 200
+# Размер страницы channels.GetParticipants (максимум сервера)
+MEMBERS_PAGE_SIZE = 200
+# Сколько раз подряд пытаемся переподключиться при обрыве соединения
+MAX_RECONNECT_ATTEMPTS = 5
+CONNECTION_ERRORS = (ConnectionError, OSError, TimeoutError, asyncio.TimeoutError)
+# Бюджет запросов страниц участников по умолчанию (запросов в минуту)
+DEFAULT_REQUESTS_PER_MINUTE = 60
+# Сколько групп из очереди парсится одновременно по умолчанию
+DEFAULT_JOB_CONCURRENCY = 3
+
+# Режим перечисления -> (название, фильтр участников на стороне сервера: имя pyrogram.enums.ChatMembersFilter)
+MEMBER_FILTERS = {
+    "all": ("Все участники", "SEARCH"),
+    "recent": ("Недавно активные", "RECENT"),
+    "administrators": ("Администраторы", "ADMINISTRATORS"),
+    "bots": ("Боты", "BOTS"),
+    "restricted": ("Ограниченные (нужны права администратора)", "RESTRICTED"),
+    "banned": ("Заблокированные (нужны права администратора)", "BANNED"),
+}
+# Фильтры, для которых сервер учитывает строку поиска
+QUERY_FILTERS = ("SEARCH", "RESTRICTED", "BANNED")
+
+
+class Signal:
+    """Простой аналог pyqtSignal для кода без Qt: emit() вызывает подписчиков"""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self._slots:
+            slot(*args)
+
+
+class RequestPacer:
+    """Адаптивный темп запросов страниц участников.
+
+    Темп не превышает заданный бюджет. При FloodWait он снижается тем
+    сильнее, чем дольше сервер просит ждать, а темп, на котором случился
+    FloodWait, запоминается как потолок. Серия успешных запросов
+    постепенно ускоряет темп и поднимает потолок обратно к бюджету.
+    """
+
+    MIN_RATE = 1.0  # запросов в минуту
+    RECOVERY_STREAK = 20  # успешных запросов для подъема потолка
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self.budget = max(float(requests_per_minute), self.MIN_RATE)
+        self.ceiling = self.budget
+        self.rate = self.budget
+        self.flood_waits = 0
+        self._streak = 0
+        self._last_request = None
+
+    async def wait(self):
+        """Пауза перед очередным запросом согласно текущему темпу.
+
+        Темп общий для всех задач, использующих пейсер: каждый вызов
+        занимает следующий свободный интервал.
+        """
+        now = time.monotonic()
+        slot = now
+        if self._last_request is not None:
+            slot = max(now, self._last_request + 60.0 / self.rate)
+        self._last_request = slot
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def on_success(self):
+        """Запрос выполнен без ограничений - понемногу ускоряемся"""
+        self._streak += 1
+        if self._streak % self.RECOVERY_STREAK == 0:
+            self.ceiling = min(self.budget, self.ceiling * 1.1)
+        self.rate = min(self.ceiling, self.rate + self.budget / self.RECOVERY_STREAK)
+
+    def on_flood_wait(self, seconds):
+        """Сервер потребовал паузу - замедляемся пропорционально ее длине"""
+        self.flood_waits += 1
+        self._streak = 0
+        self.ceiling = max(self.MIN_RATE, self.rate * 0.8)
+        self.rate = max(self.MIN_RATE, self.rate / min(2 + seconds / 10, 8))
+        # Сама пауза FloodWait уже выдержана - следующий запрос сразу после нее
+        self._last_request = None
+
+    def describe(self):
+        return f"{self.rate:.0f} запр/мин"
+
+
+class MembersCheckpoint:
+    """Точка продолжения перечисления участников"""
+
+    def __init__(self):
+        self.offset = 0  # Смещение после последней полностью полученной страницы
+        self.seen_ids = set()  # ID уже отданных участников
+        self.exhausted = False  # Сервер вернул пустую страницу - перечисление завершено
+
+
+def normalize_chat_link(chat_link):
+    """Имя группы из ссылки: https://t.me/name, t.me/s/name, telegram.me/name,
+    tg://resolve?domain=name, @name или name"""
+    # Обрабатываем разные форматы ссылок
+    chat_username = chat_link.strip()
+    if chat_username.startswith("tg://resolve?domain="):
+        chat_username = chat_username[len("tg://resolve?domain="):].split("&")[0]
+    for prefix in ("https://", "http://"):
+        if chat_username.startswith(prefix):
+            chat_username = chat_username[len(prefix):]
+    for host in ("www.t.me/", "t.me/", "telegram.me/", "telegram.dog/"):
+        if chat_username.startswith(host):
+            chat_username = chat_username[len(host):]
+            if chat_username.startswith("s/"):
+                chat_username = chat_username[2:]  # Веб-превью канала
+            break
+    if chat_username.startswith("@"):
+        chat_username = chat_username[1:]  # Убираем @
+
+    # Убираем лишние символы и параметры
+    if "/" in chat_username:
+        chat_username = chat_username.split("/")[0]
+    if "?" in chat_username:
+        chat_username = chat_username.split("?")[0]
+    return chat_username
+
+
+def split_chat_links(text):
+    """Список ссылок на группы из текста (по одной на строке или через запятую).
+
+    Ссылки на одну и ту же группу в разных форматах считаются повторами.
+    """
+    links = []
+    seen = set()
+    for link in text.replace(",", " ").split():
+        key = normalize_chat_link(link).lower()
+        if key and key not in seen:
+            seen.add(key)
+            links.append(link)
+    return links
+
+
+class TelegramClientCache:
+    """Подключенные клиенты Telegram, переиспользуемые между запусками парсинга.
+
+    Клиенты живут в цикле AsyncWorker, методы вызываются только из него.
+    client_factory создает клиента вместо pyrogram.Client (например,
+    имитацию Telegram в бенчмарках).
+    """
+
+    def __init__(self, client_factory=None):
+        self.client_factory = client_factory
+        self.clients = {}  # (сессия, api_id, api_hash) -> клиент
+        self.authorized = set()
+
+    async def acquire(self, session_name, api_id, api_hash):
+        """Подключенный клиент сессии и признак того, что он уже авторизован"""
+        key = (session_name, int(api_id), api_hash)
+        client = self.clients.get(key)
+        if client is None:
+            # Клиент той же сессии с другими ключами больше не нужен
+            await self.close(session_name)
+            client_factory = self.client_factory
+            if client_factory is None:
+                from telegram_api import Client as client_factory
+            client = self.clients[key] = client_factory(
+                session_name,
+                api_id=int(api_id),
+                api_hash=api_hash,
+                in_memory=False,
+                no_updates=True
+            )
+        if not client.is_connected:
+            await client.connect()
+        return client, key in self.authorized
+
+    def mark_authorized(self, client):
+        for key, cached in self.clients.items():
+            if cached is client:
+                self.authorized.add(key)
+
+    async def close(self, session_name=None):
+        """Отключение клиентов сессии (или всех)"""
+        for key in list(self.clients):
+            if session_name is not None and key[0] != session_name:
+                continue
+            client = self.clients.pop(key)
+            self.authorized.discard(key)
+            try:
+                if client.is_connected:
+                    await client.disconnect()
+            except Exception as e:
+                print(f"Ошибка при отключении клиента: {e}")
+
+
+class TelegramParser:
+    """Парсинг очереди Telegram групп через один клиент.
+
+    Не зависит от Qt: о ходе работы сообщает через сигналы Signal, на
+    которые подписываются GUI (TelegramParserTask в main.py) или CLI.
+    Выполняется в цикле фонового AsyncWorker (start) или напрямую через
+    asyncio.run(parser.run()). Подключенный и авторизованный клиент
+    сохраняется в TelegramClientCache и используется следующими запусками
+    без повторного подключения.
+    """
+    SIGNALS = (
+        'progress_signal',  # str
+        'progress_value',  # int
+        'job_started',  # Номер задачи, ссылка
+        'batch_signal',  # Номер задачи, пачка обработанных участников
+        'job_finished',  # Номер задачи, название группы, число участников
+        'job_failed',  # Номер задачи, текст ошибки
+        'finished_signal',  # Всего участников по всем задачам
+        'stopped_signal',  # Остановлено пользователем: всего участников, полученных до остановки
+        'error_signal',  # str
+        'auth_code_needed',  # Запрос телефона или кода (текст запроса)
+        'auth_password_needed',  # Запрос пароля 2FA
+    )
+
+    def __init__(self, api_id, api_hash, chat_links, max_members=1000, session_name=None,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, store_path=None,
+                 concurrency=DEFAULT_JOB_CONCURRENCY, client_cache=None, metrics=None, chat_cache=None,
+                 member_filter="SEARCH", query="", profiler=None):
+        for name in self.SIGNALS:
+            setattr(self, name, Signal())
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.chat_links = [chat_links] if isinstance(chat_links, str) else list(chat_links)
+        self.max_members = max_members
+        self.concurrency = max(1, concurrency)
+        self.client = None
+        self.client_cache = client_cache or TelegramClientCache()
+        self.future = None
+        self.loop = None
+        self.task = None
+        self.job_totals = {}  # Номер задачи -> участников передано подписчикам
+        self.job_stats = {}  # Номер задачи -> состав участников группы (MemberStats)
+        self._auth_future = None  # Ожидание ввода пользователя при авторизации
+        self.session_name = session_name or DEFAULT_SESSION_NAME
+        self.checkpoints = {}  # Номер задачи -> точка продолжения перечисления
+        self.pacer = RequestPacer(requests_per_minute)  # Общий бюджет запросов для всех задач
+        self.store_path = store_path  # Локальная база участников (None - не сохранять)
+        self.store = None
+        self.syncing_chats = set()  # ID групп, синхронизируемых с локальной базой сейчас
+        self.metrics = metrics or RunMetrics()  # Длительности этапов и счетчики запуска
+        self.chat_cache = chat_cache  # Кэш найденных групп (chat_cache.ChatCache, None - без кэша)
+        # Отбор участников на сервере: имя ChatMembersFilter (можно передать и само значение)
+        self.member_filter = getattr(member_filter, "name", member_filter)
+        self.query = query.strip() if self.member_filter in QUERY_FILTERS else ""
+        self.profiler = profiler  # Профилирование запуска (profiling.RunProfiler, None - без него)
+        self._reconnecting = None
+        self.is_running = True
+
+    @property
+    def filtered(self):
+        """Перечисляются не все участники, а только отобранные сервером"""
+        return self.member_filter != "SEARCH" or bool(self.query)
+
+    def describe_filter(self):
+        label = next(label for label, member_filter in MEMBER_FILTERS.values() if member_filter == self.member_filter)
+        return f"{label}, поиск: «{self.query}»" if self.query else label
+
+    def report(self, label, message):
+        """Сообщение о ходе парсинга с пометкой задачи"""
+        self.progress_signal.emit(f"[{label}] {message}" if label else message)
+
+    async def safe_get_chat_members(self, client, chat_id, limit=None, checkpoint=None, label=""):
+        """Безопасное получение участников чата (асинхронный генератор).
+
+        Участники запрашиваются постранично. После FloodWait или обрыва
+        соединения перечисление продолжается с последней полученной
+        страницы, уже отданные участники пропускаются по ID. Темп запросов
+        страниц задает self.pacer.
+        """
+        from telegram_api import FloodWait, fetch_members_page
+
+        checkpoint = checkpoint or MembersCheckpoint()
+        total = limit or (1 << 31) - 1
+        reconnect_attempts = 0
+
+        metrics = self.metrics
+        while self.is_running and not checkpoint.exhausted:
+            with metrics.timer("pacing"):
+                await self.pacer.wait()
+            try:
+                with metrics.timer("fetch_page"):
+                    page = await fetch_members_page(
+                        client, chat_id, checkpoint.offset,
+                        min(MEMBERS_PAGE_SIZE, total - len(checkpoint.seen_ids)),
+                        self.member_filter, self.query
+                    )
+            except FloodWait as e:
+                if not self.is_running:
+                    return
+                self.report(label, f"⏳ FloodWait: ожидание {e.value} сек (продолжим с {checkpoint.offset})")
+                metrics.inc("flood_waits")
+                metrics.inc("flood_wait_seconds", e.value)
+                with metrics.timer("flood_wait"):
+                    await asyncio.sleep(e.value)
+                self.pacer.on_flood_wait(e.value)
+                self.report(label, f"🐢 Темп снижен до {self.pacer.describe()}")
+                continue
+            except CONNECTION_ERRORS as e:
+                reconnect_attempts += 1
+                if reconnect_attempts > MAX_RECONNECT_ATTEMPTS or not self.is_running:
+                    raise
+                self.report(
+                    label,
+                    f"🔌 Соединение потеряно ({e}), переподключение {reconnect_attempts}/{MAX_RECONNECT_ATTEMPTS}..."
+                )
+                metrics.inc("reconnects")
+                with metrics.timer("reconnect"):
+                    await asyncio.sleep(min(2 ** reconnect_attempts, 30))
+                    await self.reconnect(client)
+                continue
+
+            reconnect_attempts = 0
+            metrics.inc("pages")
+            self.pacer.on_success()
+            if not page:
+                checkpoint.exhausted = True
+                return
+
+            for member in page:
+                if not self.is_running:  # Проверка на остановку
+                    return
+
+                user_id = member.user.id if member.user else None
+                if user_id is None or user_id in checkpoint.seen_ids:
+                    continue
+                checkpoint.seen_ids.add(user_id)
+
+                yield member
+
+                if len(checkpoint.seen_ids) >= total:
+                    return
+
+            checkpoint.offset += len(page)
+
+            # Обновляем прогресс
+            self.report(label, f"📥 Получено участников: {len(checkpoint.seen_ids)} (темп: {self.pacer.describe()})")
+            self.progress_value.emit(sum(len(c.seen_ids) for c in self.checkpoints.values()))
+
+    async def reconnect(self, client):
+        """Переподключение клиента после обрыва соединения"""
+        if self._reconnecting:
+            # Переподключение уже выполняет другая задача - ждем его
+            await self._reconnecting
+            return
+        self._reconnecting = asyncio.get_running_loop().create_future()
+        try:
+            await self._reconnect(client)
+        finally:
+            self._reconnecting.set_result(None)
+            self._reconnecting = None
+
+    async def _reconnect(self, client):
+        try:
+            if client.is_connected:
+                await client.disconnect()
+        except Exception:
+            pass
+        await client.connect()
+
+    async def transform_members(self, members):
+        """Преобразование потока участников в компактные записи (records.MemberRecord)"""
+        # Время копится локально и передается в метрики раз в пачку
+        elapsed = 0.0
+        count = 0
+        try:
+            async for member in members:
+                started = time.perf_counter()
+                try:
+                    record = record_from_user(member.user)
+                except Exception:
+                    continue
+                finally:
+                    elapsed += time.perf_counter() - started
+                    count += 1
+                if count >= MEMBERS_BATCH_SIZE:
+                    self.metrics.add_time("transform", elapsed, count)
+                    elapsed, count = 0.0, 0
+                yield record
+        finally:
+            if count:
+                self.metrics.add_time("transform", elapsed, count)
+
+    async def batch_rows(self, rows, size=MEMBERS_BATCH_SIZE):
+        """Группировка потока записей в пачки фиксированного размера.
+
+        При отмене задачи недособранная пачка все равно отдается,
+        после чего отмена продолжается.
+        """
+        batch = []
+        try:
+            async for row in rows:
+                batch.append(row)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+        except asyncio.CancelledError:
+            if batch:
+                yield batch
+            raise
+        if batch:
+            yield batch
+
+    async def request_auth_input(self, signal, *args):
+        """Запрос ввода у пользователя (телефон, код, пароль) и ожидание ответа.
+
+        Ответ приходит через provide_auth_input() из потока интерфейса. При
+        остановке парсинга ожидание отменяется, и возвращается None.
+        """
+        future = self._auth_future = self.loop.create_future()
+        signal.emit(*args)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if self.is_running:
+                raise
+            return None
+        finally:
+            self._auth_future = None
+
+    def provide_auth_input(self, value):
+        """Передача введенного значения из потока интерфейса (GUI или CLI)"""
+        future = self._auth_future
+        if future is not None:
+            self.loop.call_soon_threadsafe(self._resolve_auth_input, future, value)
+
+    @staticmethod
+    def _resolve_auth_input(future, value):
+        if not future.done():
+            future.set_result(value)
+
+    def _cancel_auth_input(self):
+        if self._auth_future is not None:
+            self._auth_future.cancel()
+
+    async def ensure_auth(self):
+        """Обеспечиваем авторизацию клиента"""
+        try:
+            # Проверяем авторизацию
+            me = await self.client.get_me()
+            self.progress_signal.emit(f"✅ Авторизован как: {me.first_name}")
+            return True
+        except Exception:
+            self.progress_signal.emit("📱 Требуется авторизация...")
+
+            # Запрашиваем номер телефона
+            phone = await self.request_auth_input(
+                self.auth_code_needed, "Введите номер телефона (например: +1234567890)"
+            )
+            if phone is None:
+                return False
+            phone = phone.strip()
+
+            # Отправляем код
+            self.progress_signal.emit(f"📤 Отправляем код на {phone}...")
+            try:
+                sent_code = await self.client.send_code(phone)
+            except Exception as e:
+                raise Exception(f"Не удалось отправить код: {str(e)}")
+
+            # Запрашиваем код подтверждения
+            code = await self.request_auth_input(
+                self.auth_code_needed, f"Введите код из SMS/Telegram для {phone}"
+            )
+            if code is None:
+                return False
+            code = code.strip()
+
+            try:
+                # Пробуем войти с кодом
+                await self.client.sign_in(phone, sent_code.phone_code_hash, code)
+                self.progress_signal.emit("✅ Авторизация успешна")
+                return True
+            except Exception as sign_error:
+                error_str = str(sign_error).lower()
+                if "password" in error_str or "2fa" in error_str or "two-step" in error_str:
+                    # Нужен пароль 2FA
+                    self.progress_signal.emit("🔐 Требуется пароль 2FA...")
+                    password = await self.request_auth_input(self.auth_password_needed)
+                    if password is None:
+                        return False
+
+                    try:
+                        await self.client.check_password(password)
+                        self.progress_signal.emit("✅ Авторизация с 2FA успешна")
+                        return True
+                    except Exception as pwd_error:
+                        raise Exception(f"Неверный пароль 2FA: {str(pwd_error)}")
+                else:
+                    raise Exception(f"Ошибка авторизации: {str(sign_error)}")
+
+    async def parse_group(self):
+        """Основная функция парсинга, возвращает всего участников (None - парсинг не выполнен)"""
+        from telegram_api import ChatAdminRequired
+
+        old_stdin = sys.stdin
+        try:
+            if not self.is_running:
+                return
+
+            self.progress_signal.emit("🔄 Инициализация клиента...")
+
+            # Перенаправляем stdin чтобы избежать консольного ввода
+            sys.stdin = StringIO("")
+
+            # Используем уже подключенный клиент или создаем новый для сессии
+            self.progress_signal.emit("🔐 Подключение к Telegram...")
+            with self.metrics.timer("connect"):
+                self.client, authorized = await self.client_cache.acquire(
+                    self.session_name, self.api_id, self.api_hash
+                )
+
+            if not self.is_running:
+                return
+
+            # Проверяем/выполняем авторизацию
+            if authorized:
+                self.progress_signal.emit("✅ Используется активное подключение")
+            else:
+                with self.metrics.timer("auth"):
+                    authorized = await self.ensure_auth()
+                if not authorized:
+                    return
+                self.client_cache.mark_authorized(self.client)
+
+            if not self.is_running:
+                return
+
+            if self.store_path:
+                self.store = MemberStore(self.store_path)
+
+            # Очередь групп: не больше self.concurrency одновременно
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def run_job(job, chat_link):
+                async with semaphore:
+                    if not self.is_running:
+                        return 0
+                    self.job_started.emit(job, chat_link)
+                    try:
+                        return await self.parse_chat(job, chat_link)
+                    except ChatAdminRequired:
+                        self.job_failed.emit(job, f"❌ {chat_link}: требуются права администратора")
+                    except Exception as e:
+                        if self.is_running:
+                            self.job_failed.emit(job, f"❌ {chat_link}: {str(e)}")
+                    return 0
+
+            totals = await asyncio.gather(*(run_job(job, link) for job, link in enumerate(self.chat_links)))
+            return sum(totals)
+
+        except Exception as e:
+            if self.is_running:
+                self.error_signal.emit(f"❌ Критическая ошибка: {str(e)}")
+        finally:
+            # Восстанавливаем stdin
+            sys.stdin = old_stdin
+            await self.cleanup()
+
+    async def parse_chat(self, job, chat_link):
+        """Парсинг одной группы из очереди, возвращает число участников"""
+        label = f"{job + 1}/{len(self.chat_links)}" if len(self.chat_links) > 1 else ""
+
+        # Получаем информацию о чате
+        self.report(label, "🔍 Получение информации о группе...")
+
+        chat_link = chat_link.strip()
+        chat_username = normalize_chat_link(chat_link)
+
+        self.report(label, f"🔍 Поиск группы: @{chat_username}")
+
+        chat, cached = await self.resolve_chat(chat_username, chat_link)
+        if cached:
+            self.report(label, "📦 Группа найдена в кэше")
+
+        if not self.is_running:
+            return 0
+
+        self.report(label, f"📊 Группа: {chat.title}")
+        self.report(label, f"👥 Участников: {chat.members_count or 'Неизвестно'}")
+
+        # Получаем участников: fetch -> transform -> пачки подписчикам
+        self.report(label, "📥 Начинаю получение участников...")
+        if self.filtered:
+            self.report(label, f"🎯 Отбор на сервере: {self.describe_filter()}")
+        # Заблокированные уже не участники группы - в локальную базу их не пишем
+        store = self.store if self.member_filter != "BANNED" else None
+        if store and chat.id in self.syncing_chats:
+            # Та же группа по другой ссылке: состав в базе сверяет задача, начавшая синхронизацию первой
+            self.report(label, "🗄️ Группа уже синхронизируется другой задачей, локальная база обновится ею")
+            store = None
+        if store:
+            self.syncing_chats.add(chat.id)
+            store.begin_sync(chat.id, chat.title)
+
+        checkpoint = self.checkpoints[job] = MembersCheckpoint()
+        stats = self.job_stats[job] = MemberStats()
+        members = self.safe_get_chat_members(self.client, chat.id, self.max_members, checkpoint, label)
+        total = 0
+        changed = 0
+        try:
+            async for batch in self.batch_rows(self.transform_members(members)):
+                total += len(batch)
+                self.job_totals[job] = total
+                self.metrics.inc("members", len(batch))
+                stats.add(batch)
+                self.metrics.members.add(batch)
+                self.batch_signal.emit(job, batch)
+                if store:
+                    with self.metrics.timer("store_upsert"):
+                        changed += store.upsert_rows(chat.id, batch)
+                self.report(label, f"🔄 Обработано: {total}")
+        except Exception:
+            # Данные группы могли устареть (сменилось имя, потерян доступ)
+            if self.chat_cache:
+                self.chat_cache.invalidate(self.session_name, chat_username)
+            raise
+        finally:
+            if store:
+                # Ушедшими помечаем только при полном перечислении чата без отбора
+                complete = self.is_running and checkpoint.exhausted and not self.filtered
+                self.syncing_chats.discard(chat.id)
+                departed = store.finish_sync(chat.id, complete)
+                self.report(label, f"🗄️ Локальная база: изменено {changed}, покинули группу {departed}")
+
+        if self.is_running:
+            self.report(label, f"📊 Состав: {stats.describe()}")
+            self.job_finished.emit(job, chat.title, total)
+        return total
+
+    async def resolve_chat(self, chat_username, chat_link):
+        """Группа по имени и признак того, что она взята из кэша.
+
+        Из кэша группа берется без запросов к серверу: ее пир записывается
+        в хранилище сессии, откуда его возьмет resolve_peer. Иначе группа
+        запрашивается через get_chat и сохраняется в кэш.
+        """
+        if self.chat_cache:
+            chat = self.chat_cache.get(self.session_name, chat_username)
+            if chat is not None:
+                try:
+                    await self.client.storage.update_peers(
+                        [(chat.id, chat.access_hash, chat.peer_type, chat_username.lower(), None)]
+                    )
+                    return chat, True
+                except Exception:
+                    self.chat_cache.invalidate(self.session_name, chat_username)
+
+        with self.metrics.timer("get_chat"):
+            try:
+                chat = await self.client.get_chat(chat_username)
+            except Exception as e:
+                if "USERNAME_INVALID" in str(e) or "USERNAME_NOT_OCCUPIED" in str(e):
+                    raise Exception(f"Группа не найдена. Проверьте ссылку: {chat_link}\nОшибка: {str(e)}")
+                raise
+
+        if self.chat_cache:
+            try:
+                # get_chat уже сохранил пир в хранилище сессии - берем оттуда access_hash
+                peer = await self.client.resolve_peer(chat.id)
+                self.chat_cache.put(self.session_name, chat_username, ResolvedChat(
+                    chat.id, getattr(peer, "access_hash", 0), chat.type.name.lower(),
+                    chat.title, chat.members_count or 0, time.time()
+                ))
+            except Exception:
+                pass
+        return chat, False
+
+    async def cleanup(self):
+        """Очистка ресурсов (клиент остается подключенным для следующих запусков)"""
+        if self.store:
+            self.store.close()
+            self.store = None
+        if self.chat_cache:
+            try:
+                self.chat_cache.save()
+            except OSError as e:
+                print(f"Ошибка при сохранении кэша групп: {e}")
+
+    def stop(self):
+        """Остановка парсинга без ожидания (можно вызывать из любого потока).
+
+        Задача отменяется сразу, даже посреди паузы FloodWait. Уже
+        полученные участники отдаются через batch_signal, по завершении
+        отправляется stopped_signal.
+        """
+        self.is_running = False
+        # После asyncio.run цикл уже закрыт, а задача отменена им самим
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._cancel_task)
+
+    def _cancel_task(self):
+        self._cancel_auth_input()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    async def _disconnect_after_stop(self):
+        """Отключение клиента, прерванного посреди запроса (следующий запуск подключится заново)"""
+        try:
+            if self.client and self.client.is_connected:
+                await self.client.disconnect()
+        except Exception as e:
+            print(f"Ошибка при отключении клиента: {e}")
+
+    async def run(self):
+        """Выполнение задачи в цикле воркера"""
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        if self.profiler:
+            self.profiler.start()
+        total = None
+        try:
+            total = await self.parse_group()
+        except asyncio.CancelledError:
+            if self.is_running:
+                # Отмена не через stop() (например, остановка воркера)
+                raise
+            if hasattr(self.task, "uncancel"):
+                self.task.uncancel()
+            await self._disconnect_after_stop()
+        except Exception as e:
+            if self.is_running:
+                self.error_signal.emit(f"❌ Ошибка выполнения: {str(e)}")
+        finally:
+            if self.profiler:
+                self.save_profile()
+
+        # Итог отправляется после сохранения профиля, чтобы сообщение о нем попало в лог запуска
+        if not self.is_running:
+            self.stopped_signal.emit(sum(self.job_totals.values()))
+        elif total is not None:
+            self.finished_signal.emit(total)
+
+    def save_profile(self):
+        try:
+            paths = self.profiler.stop()
+        except OSError as e:
+            self.progress_signal.emit(f"⚠️ Не удалось сохранить профиль: {e}")
+            return
+        if paths:
+            self.progress_signal.emit(f"🧪 Профиль запуска сохранен: {', '.join(paths)}")
+
+    def start(self, worker):
+        """Запуск задачи в фоновом воркере"""
+        self.future = worker.submit(self.run())
+
+    def isRunning(self):
+        return self.future is not None and not self.future.done()
+
+    def wait(self, timeout_ms):
+        """Ожидание завершения задачи, False - если не успела завершиться"""
+        try:
+            self.future.result(timeout_ms / 1000)
+        except concurrent.futures.TimeoutError:
+            return False
+        except BaseException:
+            pass
+        return True
+
+    def cancel(self):
+        """Прерывание задачи (отмена корутины в цикле воркера)"""
+        if self.future:
+            self.future.cancel()
@@ -0,0 +1,91 @@
+"""Профилирование запуска парсинга: cProfile и tracemalloc.
+
+Профиль снимается в потоке цикла событий, где выполняются все корутины
+парсинга: каждое возобновление корутины cProfile видит как отдельный
+вызов, поэтому время ожидания сети и пауз не попадает в собственное
+время функций. Результат - файл .prof (открывается pstats, snakeviz и
+т.п.) и текстовый отчет с главными источниками выделений памяти.
+"""
+import cProfile
+import io
+import pstats
+import tracemalloc
+
+
+# Сколько кадров стека хранит tracemalloc для каждого выделения
+TRACEMALLOC_FRAMES = 10
+# Сколько строк в разделах отчета
+REPORT_TOP = 30
+
+# Выделения самого профилировщика в отчет не попадают
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class RunProfiler:
+    """Профиль одного запуска: start() перед парсингом, stop() после.
+
+    path_prefix - путь без расширения: профиль сохраняется в
+    <path_prefix>.prof, отчет о памяти - в <path_prefix>_alloc.txt.
+    """
+
+    def __init__(self, path_prefix):
+        self.path_prefix = path_prefix
+        self.paths = []
+        self._profile = None
+        self._baseline = None
+        self._own_tracing = False
+
+    def start(self):
+        self._own_tracing = not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        """Остановка профилирования и запись файлов, возвращает их пути"""
+        if self._profile is None:
+            return []
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        if self._own_tracing:
+            tracemalloc.stop()
+
+        profile_path = f"{self.path_prefix}.prof"
+        self._profile.dump_stats(profile_path)
+
+        report_path = f"{self.path_prefix}_alloc.txt"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(self.format_report(snapshot, current, peak))
+        self._profile = None
+        self._baseline = None
+        self.paths = [profile_path, report_path]
+        return self.paths
+
+    def format_report(self, snapshot, current, peak):
+        lines = [
+            f"Память под наблюдением tracemalloc: сейчас {current / 2 ** 20:.1f} МБ, пик {peak / 2 ** 20:.1f} МБ",
+            "",
+            f"Прирост памяти за запуск по строкам кода (топ {REPORT_TOP}):",
+        ]
+        for stat in snapshot.compare_to(self._baseline, "lineno")[:REPORT_TOP]:
+            lines.append(f"  {stat}")
+
+        lines += ["", f"Удерживаемая память по стекам вызовов (топ {REPORT_TOP // 3}):"]
+        for stat in snapshot.statistics("traceback")[:REPORT_TOP // 3]:
+            lines.append(f"  {stat.size / 1024:.1f} КиБ в {stat.count} блоках")
+            lines += [f"    {line}" for line in stat.traceback.format(most_recent_first=True)]
+
+        # Краткая сводка профиля, чтобы главное было видно без pstats
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats("cumulative").print_stats(REPORT_TOP)
+        lines += ["", "Функции по суммарному времени (cProfile):", stream.getvalue()]
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+"""Компактные записи участников и их форматирование для показа и экспорта.
+
+Парсер хранит участника как MemberRecord с типизированными полями:
+числовой ID, битовая маска флагов, код статуса и время последнего
+посещения (unix-время). Текст на русском и даты формируются только
+при показе ячейки или экспорте строки.
+"""
+from datetime import datetime
+from enum import IntEnum
+from typing import NamedTuple
+
+
+# Биты поля flags
+FLAG_BOT = 1
+FLAG_VERIFIED = 2
+FLAG_SCAM = 4
+FLAG_PREMIUM = 8
+FLAG_UNKNOWN = 16  # Флаги получить не удалось
+# Флаги колонок Is Bot, Is Verified, Is Scam, Is Premium
+FLAG_COLUMNS = (FLAG_BOT, FLAG_VERIFIED, FLAG_SCAM, FLAG_PREMIUM)
+
+
+class MemberStatus(IntEnum):
+    """Код статуса участника (ONLINE ... LONG_AGO совпадают по именам с pyrogram.enums.UserStatus)"""
+    HIDDEN = 0
+    ONLINE = 1
+    OFFLINE = 2
+    RECENTLY = 3
+    LAST_WEEK = 4
+    LAST_MONTH = 5
+    LONG_AGO = 6
+    UNKNOWN = 7
+
+
+STATUS_LABELS = {
+    MemberStatus.HIDDEN: "Скрыто",
+    MemberStatus.ONLINE: "Онлайн",
+    MemberStatus.OFFLINE: "Не в сети",
+    MemberStatus.RECENTLY: "Недавно",
+    MemberStatus.LAST_WEEK: "На прошлой неделе",
+    MemberStatus.LAST_MONTH: "В прошлом месяце",
+    MemberStatus.LONG_AGO: "Давно",
+    MemberStatus.UNKNOWN: "Неизвестно",
+}
+
+# Код статуса по имени значения UserStatus
+_STATUS_BY_NAME = {status.name: status for status in MemberStatus}
+# Код статуса по тексту в экспорте
+_STATUS_BY_LABEL = {label: status for status, label in STATUS_LABELS.items()}
+
+
+class MemberRecord(NamedTuple):
+    """Участник группы в компактном виде"""
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+    phone: str
+    flags: int
+    status: MemberStatus
+    last_online: int  # unix-время последнего посещения, 0 - неизвестно
+
+
+# Колонки результатов в порядке вывода
+COLUMNS = ('ID', 'Username', 'First Name', 'Last Name', 'Phone', 'Status', 'Last Online',
+           'Is Bot', 'Is Verified', 'Is Scam', 'Is Premium')
+
+
+def record_from_user(user):
+    """Запись участника из pyrogram.types.User"""
+    try:
+        flags = ((FLAG_BOT if user.is_bot else 0) | (FLAG_VERIFIED if user.is_verified else 0)
+                 | (FLAG_SCAM if user.is_scam else 0) | (FLAG_PREMIUM if user.is_premium else 0))
+        status = MemberStatus.HIDDEN
+        last_online = 0
+        if user.status is not None:
+            status = _STATUS_BY_NAME.get(user.status.name, MemberStatus.HIDDEN)
+            if status == MemberStatus.OFFLINE and user.last_online_date:
+                last_online = int(user.last_online_date.timestamp())
+        phone = user.phone_number or ''
+    except Exception:
+        # В случае ошибки сохраняем базовые данные
+        flags, status, last_online, phone = FLAG_UNKNOWN, MemberStatus.UNKNOWN, 0, ''
+
+    return MemberRecord(user.id, user.username or '', user.first_name or '', user.last_name or '',
+                        phone, flags, status, last_online)
+
+
+def format_last_online(record):
+    """Время последнего посещения: дата для не в сети, иначе текст статуса"""
+    if record.status == MemberStatus.OFFLINE and record.last_online:
+        return datetime.fromtimestamp(record.last_online).strftime("%Y-%m-%d %H:%M:%S")
+    return STATUS_LABELS[record.status]
+
+
+def flag_value(record, flag, yes='Да', no='Нет', unknown='Неизвестно'):
+    """Значение колонки флага (по умолчанию текст для показа и экспорта)"""
+    if record.flags & FLAG_UNKNOWN:
+        return unknown
+    return yes if record.flags & flag else no
+
+
+def flags_from_values(values, yes='Да', unknown='Неизвестно'):
+    """Флаги из значений колонок FLAG_COLUMNS (обратно к flag_value)"""
+    if unknown in values:
+        return FLAG_UNKNOWN
+    return sum(flag for value, flag in zip(values, FLAG_COLUMNS) if value == yes)
+
+
+# Колонка -> функция форматирования значения
+FORMATTERS = (
+    lambda r: str(r.id),
+    lambda r: r.username,
+    lambda r: r.first_name,
+    lambda r: r.last_name,
+    lambda r: r.phone,
+    format_last_online,
+    format_last_online,
+    lambda r: flag_value(r, FLAG_BOT),
+    lambda r: flag_value(r, FLAG_VERIFIED),
+    lambda r: flag_value(r, FLAG_SCAM),
+    lambda r: flag_value(r, FLAG_PREMIUM),
+)
+
+
+def format_cell(record, column):
+    """Текст ячейки column (индекс в COLUMNS)"""
+    return FORMATTERS[column](record)
+
+
+def format_row(record):
+    """Строка результатов для экспорта: колонка -> текст"""
+    row = {column: formatter(record) for column, formatter in zip(COLUMNS, FORMATTERS)}
+    row['ID'] = record.id
+    return row
+
+
+# Текст колонок Is Bot, Is Verified, Is Scam, Is Premium -> флаги
+_FLAGS_BY_TEXT = {}
+
+
+def record_from_values(values):
+    """Запись участника из значений строки экспорта в порядке COLUMNS (обратно к format_row)"""
+    user_id, username, first_name, last_name, phone, status_text, _, *flag_texts = values
+    last_online = 0
+    status = _STATUS_BY_LABEL.get(status_text)
+    if status is None:
+        try:
+            last_online = int(datetime.fromisoformat(status_text).timestamp())
+            status = MemberStatus.OFFLINE
+        except (TypeError, ValueError):
+            status = MemberStatus.UNKNOWN
+
+    flag_texts = tuple(flag_texts)
+    flags = _FLAGS_BY_TEXT.get(flag_texts)
+    if flags is None:
+        flags = _FLAGS_BY_TEXT[flag_texts] = flags_from_values(flag_texts)
+
+    return MemberRecord(int(user_id), username or '', first_name or '', last_name or '', phone or '',
+                        flags, status, last_online)
+
+
+def record_from_row(row):
+    """Запись участника из строки экспорта: колонка -> текст"""
+    return record_from_values([row[column] for column in COLUMNS])
@@ -0,0 +1,123 @@
+"""Модель таблицы результатов для GUI.
+
+Модуль (вместе с NumPy) импортируется при первом открытии вкладки
+результатов или запуске парсинга, а не при старте приложения.
+"""
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from member_columns import MemberColumns
+from records import COLUMNS, format_cell
+from search_index import TrigramIndex
+
+
+# Фильтр результатов: (признаки, строка поиска)
+NO_FILTER = ((), "")
+
+
+class MembersTableModel(QAbstractTableModel):
+    """Модель таблицы результатов поверх колоночного хранилища (member_columns.MemberColumns).
+
+    Текст ячеек формируется только в data(), то есть для видимых строк.
+    Фильтр - пара (признаки, строка поиска): показываются строки, подходящие
+    под все признаки (member_columns.FACETS) и содержащие строку поиска
+    в username или имени.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = COLUMNS
+        self.columns = MemberColumns()
+        self.search_index = TrigramIndex()
+        self.filter = NO_FILTER
+        self.rows = None  # Номера показанных строк при фильтре, None - все строки
+        self._cached = (-1, None)  # Последняя запрошенная запись (ячейки читаются по строкам)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns) if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def record(self, row):
+        """Запись участника в строке таблицы row"""
+        source_row = row if self.rows is None else int(self.rows[row])
+        if self._cached[0] != source_row:
+            self._cached = (source_row, self.columns.record(source_row))
+        return self._cached[1]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return format_cell(self.record(index.row()), index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+    def append_records(self, records):
+        """Добавление пачки записей в конец таблицы"""
+        if not records:
+            return
+
+        start = len(self.columns)
+        if self.rows is None:
+            self.beginInsertRows(QModelIndex(), start, start + len(records) - 1)
+            self.columns.append(records)
+            self.search_index.add(records)
+            self.endInsertRows()
+            return
+
+        self.columns.append(records)
+        self.search_index.add(records)
+        matched = self.select(self.filter, start)
+        if len(matched):
+            first_row = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(matched) - 1)
+            self.rows = np.concatenate((self.rows, matched))
+            self.endInsertRows()
+
+    def select(self, row_filter, start=0):
+        """Номера строк начиная со start, подходящих под фильтр (признаки, строка поиска)"""
+        facets, query = row_filter
+        rows = self.columns.select(facets, start)
+        if query:
+            rows = np.intersect1d(rows, self.search_index.search(query, start), assume_unique=True)
+        return rows
+
+    def set_filter(self, row_filter):
+        """Показ только строк, подходящих под фильтр (NO_FILTER - все строки)"""
+        self.beginResetModel()
+        self.filter = row_filter
+        self.rows = self.select(row_filter) if row_filter != NO_FILTER else None
+        self._cached = (-1, None)
+        self.endResetModel()
+
+    def set_columns(self, columns, search_index):
+        """Показ готовых колонок и индекса поиска по ним (например, снимка, отображенного в память)"""
+        self.beginResetModel()
+        self.columns = columns
+        self.search_index = search_index
+        self.rows = self.select(self.filter) if self.filter != NO_FILTER else None
+        self._cached = (-1, None)
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self.filter != NO_FILTER
+
+    def total_count(self):
+        return len(self.columns)
+
+    def clear(self):
+        """Удаление всех записей"""
+        self.beginResetModel()
+        self.columns = MemberColumns()
+        self.search_index = TrigramIndex()
+        self.rows = np.empty(0, dtype=np.int64) if self.filter != NO_FILTER else None
+        self._cached = (-1, None)
+        self.endResetModel()
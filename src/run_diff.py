@@ -0,0 +1,141 @@
+"""Сравнение двух запусков парсинга одной группы: кто вступил, кто ушел, у кого сменился статус.
+
+Результаты запусков загружаются из файлов экспорта (CSV, JSON Lines,
+SQLite), снимков (snapshot.py) или берутся из таблицы результатов. ID
+участников сравниваются как отсортированные массивы int64 (NumPy),
+поэтому сравнение групп в сотни тысяч участников занимает доли секунды.
+"""
+import csv
+import gzip
+import json
+import sqlite3
+from typing import NamedTuple
+
+import numpy as np
+
+from exporters import SqliteExporter, exporter_for_path
+from records import (COLUMNS, MemberRecord, MemberStatus, flags_from_values, format_last_online, format_row,
+                     record_from_row, record_from_values)
+from snapshot import SNAPSHOT_EXTENSION, load_snapshot
+
+
+# Вид изменения -> текст в файле изменений
+CHANGE_LABELS = {
+    "joined": "Вступил",
+    "left": "Покинул",
+    "status": "Сменил статус",
+}
+# Колонки файла изменений
+DELTA_COLUMNS = ('Change', *COLUMNS, 'Previous Status')
+# Колонки флагов в базе SQLite (в порядке records.FLAG_COLUMNS)
+SQLITE_FLAG_COLUMNS = ('is_bot', 'is_verified', 'is_scam', 'is_premium')
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def load_records(path):
+    """Записи участников из файла экспорта или снимка (формат по расширению)"""
+    if path.endswith(SNAPSHOT_EXTENSION):
+        return load_snapshot(path).columns.records()
+    exporter_class = exporter_for_path(path)
+    if exporter_class is SqliteExporter:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [
+                MemberRecord(row['id'], row['username'] or '', row['first_name'] or '', row['last_name'] or '',
+                             row['phone'] or '',
+                             flags_from_values([row[column] for column in SQLITE_FLAG_COLUMNS], 1, None),
+                             MemberStatus.__members__.get(row['status'], MemberStatus.UNKNOWN),
+                             row['last_online'] or 0)
+                for row in conn.execute(f'SELECT * FROM "{SqliteExporter.table}"')
+            ]
+        finally:
+            conn.close()
+
+    with _open_text(path) as f:
+        if exporter_class.extension == ".jsonl":
+            return [record_from_row(json.loads(line)) for line in f if line.strip()]
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        if tuple(header) == COLUMNS:
+            return [record_from_values(values) for values in reader]
+        # Колонки в другом порядке - сопоставляем по заголовку
+        return [record_from_row(dict(zip(header, values))) for values in reader]
+
+
+class RunDiff(NamedTuple):
+    """Изменения состава группы между запусками (списки записей)"""
+    joined: list  # Есть только в новом запуске
+    left: list  # Есть только в старом запуске
+    changed: list  # (запись нового запуска, запись старого) - статус сменился
+    old_count: int
+    new_count: int
+
+    def describe(self):
+        return (f"было {self.old_count}, стало {self.new_count}: вступили {len(self.joined)}, "
+                f"покинули {len(self.left)}, сменили статус {len(self.changed)}")
+
+
+def _columns(records):
+    count = len(records)
+    ids = np.fromiter((record.id for record in records), dtype=np.int64, count=count)
+    status = np.fromiter((record.status for record in records), dtype=np.uint8, count=count)
+    return ids, status
+
+
+def diff_runs(old_records, new_records):
+    """Сравнение двух запусков по ID участников"""
+    old_ids, old_status = _columns(old_records)
+    new_ids, new_status = _columns(new_records)
+
+    # Для каждого участника нового запуска ищем его место в отсортированных ID старого
+    old_order = np.argsort(old_ids, kind="stable")
+    old_sorted = old_ids[old_order]
+    positions = np.minimum(np.searchsorted(old_sorted, new_ids), max(len(old_sorted) - 1, 0))
+    found = old_sorted[positions] == new_ids if len(old_sorted) else np.zeros(len(new_ids), dtype=bool)
+
+    matched_new = np.flatnonzero(found)
+    matched_old = old_order[positions[matched_new]]
+    present = np.zeros(len(old_ids), dtype=bool)
+    present[matched_old] = True
+    changed = old_status[matched_old] != new_status[matched_new]
+
+    return RunDiff(
+        joined=[new_records[row] for row in np.flatnonzero(~found).tolist()],
+        left=[old_records[row] for row in np.flatnonzero(~present).tolist()],
+        changed=[(new_records[new_row], old_records[old_row])
+                 for new_row, old_row in zip(matched_new[changed].tolist(), matched_old[changed].tolist())],
+        old_count=len(old_records),
+        new_count=len(new_records),
+    )
+
+
+def delta_rows(diff):
+    """Строки файла изменений: колонка -> текст"""
+    for change, records in (("joined", diff.joined), ("left", diff.left)):
+        for record in records:
+            yield {'Change': CHANGE_LABELS[change], **format_row(record), 'Previous Status': ''}
+    for record, previous in diff.changed:
+        yield {'Change': CHANGE_LABELS["status"], **format_row(record),
+               'Previous Status': format_last_online(previous)}
+
+
+def write_delta(path, diff):
+    """Сохранение изменений в CSV или JSON Lines (по расширению, .gz - со сжатием)"""
+    if exporter_for_path(path) is SqliteExporter:
+        raise ValueError("Изменения сохраняются только в CSV или JSON Lines")
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        if exporter_for_path(path).extension == ".jsonl":
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in delta_rows(diff))
+        else:
+            writer = csv.DictWriter(f, fieldnames=DELTA_COLUMNS)
+            writer.writeheader()
+            writer.writerows(delta_rows(diff))
@@ -0,0 +1,140 @@
+"""Поиск участников по подстроке в username и имени.
+
+Индекс триграмм пополняется пачками по мере парсинга. Триграммы пачки
+считаются векторно (NumPy) и складываются в сегменты: отсортированные
+триграммы со списками строк. Соседние сегменты близкого размера
+сливаются, поэтому сегментов всегда O(log n). Для запроса из трех и
+более символов кандидаты берутся пересечением списков строк его
+триграмм, затем подстрока проверяется только у кандидатов.
+"""
+import numpy as np
+
+
+# Сколько строк проще проверить перебором, чем через индекс
+LINEAR_SCAN_ROWS = 2000
+# Разделитель текстов строк при подсчете триграмм пачки
+SEPARATOR = "\x00"
+
+
+def _trigram_codes(text):
+    """Коды триграмм текста: три символа по 21 биту в одном int64"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    return codes, (codes[:-2] << 42) | (codes[1:-1] << 21) | codes[2:]
+
+
+class Segment:
+    """Отсортированные триграммы и возрастающие номера строк для каждой из них"""
+
+    def __init__(self, keys, rows):
+        # keys/rows - пары, отсортированные по триграмме, затем по строке, без повторов
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else np.empty(0, int)
+        self.keys = keys[starts]
+        self.offsets = np.append(starts, len(keys))
+        self.rows = rows
+
+    @classmethod
+    def from_arrays(cls, keys, offsets, rows):
+        """Сегмент из готовых массивов (например, из снимка результатов)"""
+        segment = cls.__new__(cls)
+        segment.keys = keys
+        segment.offsets = offsets
+        segment.rows = rows
+        return segment
+
+    def __len__(self):
+        return len(self.rows)
+
+    def pairs(self):
+        return np.repeat(self.keys, np.diff(self.offsets)), self.rows
+
+    def lookup(self, key):
+        position = np.searchsorted(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self.rows[self.offsets[position]:self.offsets[position + 1]]
+        return self.rows[:0]
+
+
+class TrigramIndex:
+    """Индекс триграмм по тексту строк результатов"""
+
+    def __init__(self):
+        self.texts = []  # Текст строки для поиска (в нижнем регистре)
+        self.segments = []  # Сегменты по возрастанию номеров строк
+
+    @classmethod
+    def from_segments(cls, texts, segments):
+        """Готовый индекс (например, из снимка результатов), только для поиска.
+
+        texts - последовательность текстов строк (len и доступ по номеру).
+        """
+        index = cls()
+        index.texts = texts
+        index.segments = segments
+        return index
+
+    def __len__(self):
+        return len(self.texts)
+
+    @staticmethod
+    def search_text(record):
+        # Поля разделены переводом строки, чтобы запрос не совпадал на их стыке
+        return f"{record.username}\n{record.first_name}\n{record.last_name}".lower()
+
+    def add(self, records):
+        """Добавление пачки записей (номера строк продолжают предыдущие)"""
+        if not records:
+            return
+        start = len(self.texts)
+        texts = [self.search_text(record) for record in records]
+        self.texts.extend(texts)
+
+        codes, keys = _trigram_codes(SEPARATOR.join(texts) + SEPARATOR)
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        rows = np.repeat(np.arange(start, start + len(texts), dtype=np.int32), lengths)[:-2]
+        # Триграммы на стыке двух строк не нужны
+        valid = (codes[:-2] != 0) & (codes[1:-1] != 0) & (codes[2:] != 0)
+        keys, rows = keys[valid], rows[valid]
+
+        order = np.lexsort((rows, keys))
+        keys, rows = keys[order], rows[order]
+        unique = np.concatenate(([True], (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])))
+        self.segments.append(Segment(keys[unique], rows[unique]))
+
+        # Сливаем последний сегмент с предыдущим, пока тот не станет заметно больше
+        while len(self.segments) > 1 and len(self.segments[-2]) <= 2 * len(self.segments[-1]):
+            older, newer = self.segments[-2:]
+            older_keys, older_rows = older.pairs()
+            newer_keys, newer_rows = newer.pairs()
+            keys = np.concatenate((older_keys, newer_keys))
+            rows = np.concatenate((older_rows, newer_rows))
+            # Устойчивая сортировка сохраняет порядок строк внутри триграммы
+            order = np.argsort(keys, kind="stable")
+            self.segments[-2:] = [Segment(keys[order], rows[order])]
+
+    def lookup(self, key):
+        """Все строки с триграммой key (по возрастанию)"""
+        parts = [segment.lookup(key) for segment in self.segments]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+    def search(self, query, start=0):
+        """Номера строк не меньше start, содержащих query (без учета регистра)"""
+        query = query.strip().lower()
+        texts = self.texts
+        if len(query) < 3 or len(texts) - start <= LINEAR_SCAN_ROWS:
+            return np.array([row for row in range(start, len(texts)) if query in texts[row]], dtype=np.int64)
+
+        _, keys = _trigram_codes(query)
+        lists = []
+        for key in np.unique(keys):
+            rows = self.lookup(key)
+            if not len(rows):
+                return np.empty(0, dtype=np.int64)
+            lists.append(rows)
+        lists.sort(key=len)
+
+        candidates = lists[0][np.searchsorted(lists[0], start):]
+        for rows in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return np.array([row for row in candidates.tolist() if query in texts[row]], dtype=np.int64)
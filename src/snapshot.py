@@ -0,0 +1,205 @@
+"""Двоичный снимок результатов парсинга для быстрого повторного открытия.
+
+Файл снимка - заголовок JSON и колонки member_columns.MemberColumns
+как есть: массивы фиксированной ширины (ID, признаки, статус, время
+в сети, номера строк) и таблица строк (смещения и байты UTF-8), а также
+сегменты индекса поиска search_index.TrigramIndex с текстами строк. При
+открытии файл отображается в память (np.memmap): колонки и индекс
+читаются без разбора и копирования, ОС подгружает только страницы, к
+которым обращаются фильтры, поиск и видимые строки таблицы. Строки
+декодируются по одной, когда запрашиваются, тексты для поиска - все
+сразу при первом поиске.
+
+Формат:
+    MAGIC, длина заголовка (uint32 LE), заголовок JSON,
+    массивы, каждый с границы ALIGNMENT байт от начала данных.
+"""
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from atomic_file import atomic_write
+from member_columns import MemberColumns
+from search_index import SEPARATOR, Segment, TrigramIndex
+
+
+SNAPSHOT_EXTENSION = ".tgsnap"
+MAGIC = b"TGSNAP\x00\x01"
+VERSION = 1
+# Выравнивание массивов в файле (не меньше размера элемента любого массива)
+ALIGNMENT = 64
+
+# Колонка -> тип элементов в файле
+COLUMN_DTYPES = {
+    "ids": "<i8",
+    "flags": "u1",
+    "status": "u1",
+    "last_online": "<i8",
+    **{field: "<i4" for field in MemberColumns.STRING_FIELDS},
+}
+
+
+class SnapshotError(ValueError):
+    """Файл не является снимком результатов или поврежден"""
+
+
+class SnapshotStringPool:
+    """Таблица строк снимка: строка декодируется из отображенного файла при обращении"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def get_many(self, indices):
+        """Строки по списку номеров (каждая различная строка декодируется один раз)"""
+        if not len(indices):
+            return []
+        unique, inverse = np.unique(np.asarray(indices, dtype=np.int64), return_inverse=True)
+        starts = self.offsets[unique].tolist()
+        ends = self.offsets[unique + 1].tolist()
+        data = memoryview(self.data)
+        decoded = [str(data[start:end], "utf-8") for start, end in zip(starts, ends)]
+        return [decoded[position] for position in inverse.tolist()]
+
+
+class SnapshotTexts:
+    """Тексты строк для поиска из снимка: декодируются целиком при первом обращении к тексту"""
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+        self._texts = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        if self._texts is None:
+            self._texts = str(memoryview(self.data), "utf-8").split(SEPARATOR) if self.count else []
+        return self._texts[row]
+
+
+class Snapshot:
+    """Открытый снимок: колонки и индекс поиска (только для чтения) и данные о запуске"""
+
+    def __init__(self, path, columns, search_index, info):
+        self.path = path
+        self.columns = columns
+        self.search_index = search_index
+        self.info = info  # Название группы, время создания и т.п.
+
+    @property
+    def title(self):
+        return self.info.get("title") or os.path.basename(self.path)
+
+    def describe(self):
+        created = time.strftime("%d.%m.%Y %H:%M", time.localtime(self.info.get("created", 0)))
+        return f"{self.title} ({len(self.columns)}, {created})"
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _string_table(pool):
+    """Смещения и байты UTF-8 строк пула"""
+    encoded = [value.encode("utf-8") for value in pool.strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def save_snapshot(path, columns, search_index, **info):
+    """Сохранение колонок результатов и индекса поиска по ним в файл снимка.
+
+    info - данные о запуске (title - название группы и т.п.), сохраняются
+    в заголовке. Прерванная запись не оставляет испорченный снимок
+    (atomic_file.atomic_write).
+    """
+    size = len(columns)
+    arrays = {name: getattr(columns, name)[:size] for name in ("ids", "flags", "status", "last_online")}
+    arrays.update((field, columns.strings[field][:size]) for field in MemberColumns.STRING_FIELDS)
+    arrays = {name: np.ascontiguousarray(array, dtype=COLUMN_DTYPES[name]) for name, array in arrays.items()}
+    arrays["string_offsets"], arrays["string_data"] = _string_table(columns.pool)
+    arrays["search_texts"] = np.frombuffer(SEPARATOR.join(search_index.texts).encode("utf-8"), dtype=np.uint8)
+    for number, segment in enumerate(search_index.segments):
+        arrays[f"search_keys_{number}"] = segment.keys
+        arrays[f"search_offsets_{number}"] = segment.offsets
+        arrays[f"search_rows_{number}"] = segment.rows
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += array.nbytes
+    header = json.dumps({
+        "version": VERSION,
+        "count": size,
+        "search_segments": len(search_index.segments),
+        "created": time.time(),
+        **info,
+        "arrays": layout,
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.data)
+        f.truncate(data_start + offset)
+    return path
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or not prefix.startswith(MAGIC):
+            raise SnapshotError(f"{path}: не является снимком результатов")
+        header_size, = struct.unpack("<I", prefix[len(MAGIC):])
+        try:
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        except ValueError:
+            raise SnapshotError(f"{path}: поврежден заголовок снимка")
+    if header.get("version") != VERSION:
+        raise SnapshotError(f"{path}: неподдерживаемая версия снимка {header.get('version')}")
+    return header, _align(len(MAGIC) + 4 + header_size)
+
+
+def load_snapshot(path):
+    """Открытие снимка: колонки и индекс поиска отображаются в память, данные не копируются"""
+    header, data_start = _read_header(path)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        end = start + spec["length"] * dtype.itemsize
+        if end > len(buffer):
+            raise SnapshotError(f"{path}: файл снимка обрезан")
+        arrays[name] = buffer[start:end].view(dtype)
+
+    segments = [
+        Segment.from_arrays(arrays.pop(f"search_keys_{number}"), arrays.pop(f"search_offsets_{number}"),
+                            arrays.pop(f"search_rows_{number}"))
+        for number in range(header["search_segments"])
+    ]
+    search_index = TrigramIndex.from_segments(SnapshotTexts(arrays.pop("search_texts"), header["count"]), segments)
+    columns = MemberColumns.from_arrays(
+        SnapshotStringPool(arrays.pop("string_offsets"), arrays.pop("string_data")),
+        **arrays
+    )
+    info = {key: value for key, value in header.items() if key not in ("version", "search_segments", "arrays")}
+    return Snapshot(path, columns, search_index, info)
@@ -0,0 +1,77 @@
+"""Запросы к Telegram через pyrogram.
+
+Единственный модуль ядра, импортирующий pyrogram (вместе с TgCrypto это
+самая долгая часть запуска приложения). parser_core импортирует его
+только при запуске парсинга.
+"""
+from pyrogram import Client, raw, types
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.errors import ChatAdminRequired, FloodWait
+
+
+__all__ = ("Client", "ChatAdminRequired", "FloodWait", "fetch_members_page")
+
+
+def participants_filter(member_filter, query=""):
+    """Фильтр raw-запроса channels.GetParticipants для режима member_filter (имя ChatMembersFilter)"""
+    if member_filter == "BANNED":
+        return raw.types.ChannelParticipantsKicked(q=query)
+    if member_filter == "RESTRICTED":
+        return raw.types.ChannelParticipantsBanned(q=query)
+    if member_filter == "BOTS":
+        return raw.types.ChannelParticipantsBots()
+    if member_filter == "RECENT":
+        return raw.types.ChannelParticipantsRecent()
+    if member_filter == "ADMINISTRATORS":
+        return raw.types.ChannelParticipantsAdmins()
+    return raw.types.ChannelParticipantsSearch(q=query)
+
+
+def matches_filter(member, member_filter, query=""):
+    """Проверка участника обычной группы: для нее сервер не фильтрует список"""
+    if member_filter in ("BANNED", "RESTRICTED"):
+        return False  # В обычных группах нет списков заблокированных и ограниченных
+    if member_filter == "BOTS" and not member.user.is_bot:
+        return False
+    if member_filter == "ADMINISTRATORS" and member.status not in (
+            ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR):
+        return False
+    if query and member_filter == "SEARCH":
+        user = member.user
+        text = f"{user.username or ''} {user.first_name or ''} {user.last_name or ''}".lower()
+        return query.lower() in text
+    return True
+
+
+async def fetch_members_page(client, chat_id, offset, limit, member_filter="SEARCH", query=""):
+    """Получение одной страницы участников начиная с offset.
+
+    В отличие от client.get_chat_members, FloodWait не ожидается внутри
+    pyrogram, а пробрасывается наверх - ожиданием управляет вызывающий код.
+    Отбор по member_filter и строке поиска query выполняет сервер.
+    """
+    peer = await client.resolve_peer(chat_id)
+
+    if isinstance(peer, raw.types.InputPeerChat):
+        # Обычная группа отдает всех участников одним запросом
+        if offset:
+            return []
+        r = await client.invoke(raw.functions.messages.GetFullChat(chat_id=peer.chat_id), sleep_threshold=0)
+        members = getattr(r.full_chat.participants, "participants", [])
+        users = {u.id: u for u in r.users}
+        members = [types.ChatMember._parse(client, member, users, {}) for member in members]
+        return [member for member in members if member.user and matches_filter(member, member_filter, query)]
+
+    r = await client.invoke(
+        raw.functions.channels.GetParticipants(
+            channel=peer,
+            filter=participants_filter(member_filter, query),
+            offset=offset,
+            limit=limit,
+            hash=0
+        ),
+        sleep_threshold=0
+    )
+    users = {u.id: u for u in r.users}
+    chats = {c.id: c for c in r.chats}
+    return [types.ChatMember._parse(client, member, users, chats) for member in r.participants]